@@ -0,0 +1,92 @@
+"""
+Benchmark for the live copilot's outbound ai_chunk path.
+
+Streams N synthetic answers (default 1,000, run `--concurrency` at a time) into a fake
+websocket, once with one send_json per token (the old path) and once through
+core.streaming.FrameBatcher, and reports frames per answer and server CPU time.
+
+Usage: python bench_ai_frames.py --answers 1000 --tokens 120 --token-ms 4
+"""
+import time
+import json
+import asyncio
+import argparse
+
+from core.streaming import FrameBatcher
+
+
+class FakeWebSocket:
+    """Counts frames; encodes like Starlette does so JSON cost is included."""
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    async def send_text(self, text):
+        self.frames += 1
+        self.bytes += len(text.encode("utf-8"))
+        await asyncio.sleep(0)  # yield like a real socket write
+
+
+async def token_stream(tokens: int, token_ms: float):
+    for i in range(tokens):
+        await asyncio.sleep(token_ms / 1000)
+        yield f" word{i}"
+
+
+async def answer_per_token(tokens, token_ms):
+    ws = FakeWebSocket()
+    await ws.send_json({"event": "ai_start"})
+    full_answer = ""
+    async for chunk in token_stream(tokens, token_ms):
+        full_answer += chunk
+        await ws.send_json({"event": "ai_chunk", "text": chunk})
+    await ws.send_json({"event": "ai_done"})
+    return ws.frames
+
+
+async def answer_batched(tokens, token_ms):
+    ws = FakeWebSocket()
+    outbox = FrameBatcher(ws)
+    await outbox.send_event({"event": "ai_start"})
+    parts = []
+    async for chunk in token_stream(tokens, token_ms):
+        parts.append(chunk)
+        await outbox.add_chunk(chunk)
+    "".join(parts)
+    await outbox.send_event({"event": "ai_done"})
+    await outbox.close()
+    return ws.frames
+
+
+async def run(mode, args):
+    answer = answer_per_token if mode == "per-token" else answer_batched
+    frames = []
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for start in range(0, args.answers, args.concurrency):
+        batch = min(args.concurrency, args.answers - start)
+        frames += await asyncio.gather(*(answer(args.tokens, args.token_ms) for _ in range(batch)))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    print(f"{mode:>10} | frames/answer {sum(frames) / len(frames):7.1f} | "
+          f"CPU per 1k answers {cpu / args.answers * 1000:6.2f} s | wall {wall:5.1f} s")
+
+
+async def main(args):
+    print(f"📡 {args.answers} answers x {args.tokens} tokens, one token every {args.token_ms} ms")
+    print("-" * 70)
+    await run("per-token", args)
+    await run("batched", args)
+    print("-" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--answers", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=120)
+    parser.add_argument("--token-ms", type=float, default=4)
+    parser.add_argument("--concurrency", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,166 @@
+"""
+Load test for core.deepgram_pool against a local mock of Deepgram's live API.
+
+The mock speaks the same protocol as wss://api.deepgram.com/v1/listen:
+- token auth on the handshake;
+- binary audio in, `Results` (interim, then final) and `UtteranceEnd` out;
+- `KeepAlive` is accepted and `CloseStream` gets a `Metadata` reply before close;
+- idle sockets are dropped after 10 s, like the real service.
+A handshake delay stands in for the TLS + network round trips to Deepgram.
+
+A burst of sessions joins once with pre-warming off (a connection per session,
+the old path) and once with a warm pool. The script reports acquire latency,
+time to the first final transcript, and the pool's counters.
+
+Usage: python bench_deepgram_pool.py --sessions 40 --pool-size 8 --handshake-ms 250
+       python bench_deepgram_pool.py --idle-s 15   # pooled sockets must survive the idle timeout
+"""
+import time
+import logging
+import json
+import asyncio
+import argparse
+import statistics
+
+from websockets.asyncio.server import serve
+from deepgram import LiveTranscriptionEvents
+
+from core.deepgram_pool import DeepgramPool
+
+logging.getLogger("backend").setLevel(logging.ERROR)  # pool-exhausted warnings are counted in stats
+
+API_KEY = "mock-key"
+IDLE_TIMEOUT = 10  # seconds without audio or KeepAlive before Deepgram closes (NET-0001)
+CHUNKS_PER_UTTERANCE = 4
+
+
+# --- MOCK DEEPGRAM ---
+def results(text, is_final, start):
+    return json.dumps({
+        "type": "Results",
+        "channel_index": [0, 1],
+        "duration": 0.5,
+        "start": start,
+        "is_final": is_final,
+        "speech_final": is_final,
+        "channel": {"alternatives": [{"transcript": text, "confidence": 0.99, "words": []}]},
+        "metadata": {"request_id": "mock", "model_info": {"name": "nova-2", "version": "mock", "arch": "mock"},
+                     "model_uuid": "mock"},
+    })
+
+
+class MockDeepgram:
+    def __init__(self, handshake_ms):
+        self.handshake = handshake_ms / 1000
+        self.accepted = 0
+        self.keepalives = 0
+        self.idle_drops = 0
+
+    async def process_request(self, connection, request):
+        await asyncio.sleep(self.handshake)
+        if not request.path.startswith("/v1/listen"):
+            return connection.respond(404, "Not Found\n")
+        if request.headers.get("Authorization") != f"Token {API_KEY}":
+            return connection.respond(401, "Unauthorized\n")
+        return None
+
+    async def handler(self, websocket):
+        self.accepted += 1
+        chunks = 0
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.recv(), IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.idle_drops += 1
+                await websocket.close(1011, "NET-0001: no audio received within the timeout")
+                return
+            except Exception:
+                return
+
+            if isinstance(message, bytes):
+                chunks += 1
+                words = " ".join(["hello"] * (chunks % CHUNKS_PER_UTTERANCE or CHUNKS_PER_UTTERANCE))
+                if chunks % CHUNKS_PER_UTTERANCE:
+                    await websocket.send(results(words, False, chunks * 0.5))
+                else:
+                    await websocket.send(results("tell me about yourself?", True, chunks * 0.5))
+                    await websocket.send(json.dumps({"type": "UtteranceEnd", "channel": [0, 1], "last_word_end": chunks * 0.5}))
+                continue
+
+            kind = json.loads(message).get("type")
+            if kind == "KeepAlive":
+                self.keepalives += 1
+            elif kind == "CloseStream":
+                await websocket.send(json.dumps({"type": "Metadata", "request_id": "mock", "duration": chunks * 0.5,
+                                                 "channels": 1, "models": [], "model_info": {}}))
+                await websocket.close(1000)
+                return
+
+
+# --- SESSIONS ---
+async def session(pool, loop):
+    joined = time.perf_counter()
+    connection = await pool.acquire()
+    acquired = time.perf_counter()
+    first_final = loop.create_future()
+
+    def on_message(self, result, **kwargs):
+        if result.is_final and not first_final.done():
+            loop.call_soon_threadsafe(lambda: first_final.done() or first_final.set_result(time.perf_counter()))
+
+    connection.on(LiveTranscriptionEvents.Transcript, on_message)
+    try:
+        for _ in range(CHUNKS_PER_UTTERANCE):
+            await asyncio.to_thread(connection.send, b"\x00" * 3200)
+        transcript_at = await asyncio.wait_for(first_final, 10)
+    finally:
+        await pool.release(connection)
+    return (acquired - joined) * 1000, (transcript_at - joined) * 1000
+
+
+async def run(mode, pool_size, args, port):
+    pool = DeepgramPool(API_KEY, url=f"http://127.0.0.1:{port}", size=pool_size)
+    refill = asyncio.create_task(pool.run())
+    while len(pool._idle) < pool_size:
+        await asyncio.sleep(0.05)
+    if args.idle_s:
+        await asyncio.sleep(args.idle_s)
+
+    loop = asyncio.get_running_loop()
+    tasks = []
+    for _ in range(args.sessions):
+        tasks.append(asyncio.create_task(session(pool, loop)))
+        await asyncio.sleep(args.arrival_ms / 1000)
+    timings = await asyncio.gather(*tasks)
+
+    refill.cancel()
+    await pool.close()
+    acquire = sorted(t[0] for t in timings)
+    transcript = sorted(t[1] for t in timings)
+    p95 = lambda values: values[int(len(values) * 0.95)]
+    print(f"{mode:>7} | acquire p50 {statistics.median(acquire):6.1f} ms  p95 {p95(acquire):6.1f} ms | "
+          f"first final p50 {statistics.median(transcript):6.1f} ms  p95 {p95(transcript):6.1f} ms")
+    print(f"        | {pool.stats()}")
+
+
+async def main(args):
+    mock = MockDeepgram(args.handshake_ms)
+    async with serve(mock.handler, "127.0.0.1", 0, process_request=mock.process_request) as server:
+        port = server.sockets[0].getsockname()[1]
+        print(f"🎧 {args.sessions} sessions, one every {args.arrival_ms} ms, "
+              f"handshake {args.handshake_ms} ms, pool size {args.pool_size}")
+        print("-" * 100)
+        await run("cold", 0, args, port)
+        await run("pooled", args.pool_size, args, port)
+        print("-" * 100)
+        print(f"mock: {mock.accepted} connections, {mock.keepalives} KeepAlives, {mock.idle_drops} idle drops")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--arrival-ms", type=float, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=250)
+    parser.add_argument("--idle-s", type=float, default=0)
+    asyncio.run(main(parser.parse_args()))
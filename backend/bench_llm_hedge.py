@@ -0,0 +1,168 @@
+"""
+Tail-latency benchmark for hedged LLM streaming (core.hedging, LLM_HEDGING=1).
+
+Starts two local fake OpenAI-compatible SSE servers, one standing in for Groq
+(fast, but a share of requests stalls before the first token) and one for
+OpenRouter (a bit slower, steady). The same workload streams through
+model_router.stream with hedging off, then on, and the time to first token
+(p50/p95/p99), the hedge rate and the requests sent to each provider are
+reported.
+
+Fails (exit 1) when hedging doesn't improve p99 TTFT or the hedge rate goes
+over --max-rate.
+
+Usage: python bench_llm_hedge.py --requests 300 --concurrency 8 --stall-rate 0.05 --stall-ms 2500
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+FAKE_GROQ_PORT = 8767
+FAKE_OPENROUTER_PORT = 8768
+
+# Must be set before core.llm / core.hedging read their settings
+os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{FAKE_GROQ_PORT}"
+os.environ["OPENROUTER_BASE_URL"] = f"http://127.0.0.1:{FAKE_OPENROUTER_PORT}/api/v1"
+os.environ.setdefault("GROQ_API_KEY", "fake-key")
+os.environ.setdefault("OPENROUTER_API_KEY", "fake-key")
+os.environ["LLM_HEDGING"] = "1"
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from core.router import model_router
+from core.hedging import hedger
+
+
+def build_fake_provider(path, ttft_ms, jitter_ms, stall_rate, stall_ms, tokens, seed):
+    """OpenAI-compatible SSE endpoint; `stall_rate` of requests wait `stall_ms` before the first token."""
+    fake = FastAPI()
+    rng = random.Random(seed)
+    fake.state.requests = 0
+
+    @fake.post(path)
+    async def completions(request: Request):
+        body = await request.json()
+        fake.state.requests += 1
+        delay = ttft_ms + rng.uniform(0, jitter_ms)
+        if rng.random() < stall_rate:
+            delay = stall_ms
+
+        async def events():
+            await asyncio.sleep(delay / 1000)
+            for i in range(tokens):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": f"tok{i} "}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.005)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return fake
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def ask(index, results):
+    messages = [{"role": "user", "content": f"Question {index}: what is your notice period?"}]
+    started = time.perf_counter()
+    first_token = None
+    async for chunk in model_router.stream(messages, question="what is your notice period?"):
+        if first_token is None:
+            first_token = time.perf_counter() - started
+        if "[AI Connection Error" in chunk:
+            first_token = None
+            break
+    results.append(first_token)
+
+
+async def run_workload(args):
+    results = []
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(index):
+        async with slots:
+            await ask(index, results)
+
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    return [r * 1000 for r in results if r is not None], len(results)
+
+
+def report(label, ttft, total):
+    print(f"{label:<12} TTFT p50 {percentile(ttft, 50):7.1f} ms | p95 {percentile(ttft, 95):7.1f} ms | "
+          f"p99 {percentile(ttft, 99):7.1f} ms | errors {total - len(ttft)}")
+
+
+async def main(args):
+    groq = build_fake_provider("/openai/v1/chat/completions", args.groq_ttft_ms, args.jitter_ms,
+                               args.stall_rate, args.stall_ms, args.tokens, seed=1)
+    openrouter = build_fake_provider("/api/v1/chat/completions", args.openrouter_ttft_ms, args.jitter_ms,
+                                     0.0, 0, args.tokens, seed=2)
+    servers = [
+        uvicorn.Server(uvicorn.Config(groq, port=FAKE_GROQ_PORT, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(openrouter, port=FAKE_OPENROUTER_PORT, log_level="warning")),
+    ]
+    tasks = [asyncio.create_task(s.serve()) for s in servers]
+    while not all(s.started for s in servers):
+        await asyncio.sleep(0.05)
+
+    print(f"🚀 {args.requests} requests x{args.concurrency} | Groq TTFT {args.groq_ttft_ms}ms, "
+          f"{args.stall_rate:.0%} stall {args.stall_ms}ms | OpenRouter TTFT {args.openrouter_ttft_ms}ms")
+    print("-" * 78)
+    hedger.enabled = False
+    plain, plain_total = await run_workload(args)
+    report("no hedging", plain, plain_total)
+
+    hedger.enabled = True
+    hedger.max_rate = args.max_rate
+    groq.state.requests = openrouter.state.requests = 0
+    hedged, hedged_total = await run_workload(args)
+    report("hedging", hedged, hedged_total)
+    stats = hedger.stats()
+    print(f"Hedged {stats['hedged']}/{stats['requests']} ({stats['hedge_rate']:.1%}), won {stats['hedge_wins']}, "
+          f"capped {stats['capped']} | deadline {stats['deadline_ms']:.0f}ms | "
+          f"requests: groq {groq.state.requests}, openrouter {openrouter.state.requests}")
+    print("-" * 78)
+
+    for s in servers:
+        s.should_exit = True
+    await asyncio.gather(*tasks)
+
+    failed = False
+    if percentile(hedged, 99) >= percentile(plain, 99):
+        print("❌ hedging did not improve p99 TTFT")
+        failed = True
+    if stats["hedge_rate"] > args.max_rate + 0.01:
+        print(f"❌ hedge rate over the {args.max_rate:.0%} cap")
+        failed = True
+    if not failed:
+        print("✅ hedging cut tail TTFT within the hedge-rate cap")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--groq-ttft-ms", type=int, default=150)
+    parser.add_argument("--openrouter-ttft-ms", type=int, default=350)
+    parser.add_argument("--jitter-ms", type=int, default=100)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--stall-ms", type=int, default=2500)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--max-rate", type=float, default=float(os.getenv("HEDGE_MAX_RATE", "0.1")))
+    asyncio.run(main(parser.parse_args()))
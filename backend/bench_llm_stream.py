@@ -0,0 +1,153 @@
+"""
+Load test for live answer streaming (core.router.model_router.stream).
+
+Spins up a local fake Groq server plus a minimal copilot websocket app that streams
+answers through model_router.stream, then opens many concurrent websockets and reports
+time-to-first-token (p50/p99) and the worst event loop stall seen by the server.
+
+Usage: python bench_llm_stream.py --clients 60 --ttft-ms 150 --tokens 40
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+FAKE_GROQ_PORT = 8765
+COPILOT_PORT = 8766
+
+# Must be set before core.llm builds its client
+os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{FAKE_GROQ_PORT}"
+os.environ.setdefault("GROQ_API_KEY", "fake-key")
+
+import uvicorn
+import websockets
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import StreamingResponse
+
+from core.llm import get_client
+from core.router import model_router
+
+
+def build_fake_groq(ttft_ms: int, tokens: int, token_ms: int) -> FastAPI:
+    """A tiny OpenAI-compatible SSE server that mimics Groq's streaming endpoint."""
+    fake = FastAPI()
+
+    @fake.post("/openai/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+
+        async def events():
+            await asyncio.sleep(ttft_ms / 1000)
+            for i in range(tokens):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": f"tok{i} "}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(token_ms / 1000)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return fake
+
+
+async def loop_probe(stalls: list):
+    """Measures how late the loop wakes us up; a blocking stream shows up here."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        stalls.append(time.perf_counter() - started - 0.01)
+
+
+def build_copilot() -> FastAPI:
+    """Mirrors the ai_start / ai_chunk / ai_done flow of main.trigger_ai_response."""
+    copilot = FastAPI()
+
+    @copilot.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        question = await websocket.receive_text()
+        await websocket.send_json({"event": "ai_start"})
+        messages = [{"role": "user", "content": question}]
+        async for chunk in model_router.stream(messages, question=question):
+            await websocket.send_json({"event": "ai_chunk", "text": chunk})
+        await websocket.send_json({"event": "ai_done"})
+        await websocket.close()
+
+    return copilot
+
+
+async def run_client(index: int, results: list):
+    async with websockets.connect(f"ws://127.0.0.1:{COPILOT_PORT}/ws", max_size=None) as ws:
+        started = time.perf_counter()
+        await ws.send(f"Question {index}: tell me about yourself?")
+        first_token = None
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg["event"] == "ai_chunk" and first_token is None:
+                first_token = time.perf_counter() - started
+            if msg["event"] == "ai_done":
+                break
+        results.append((first_token, time.perf_counter() - started))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def main(args):
+    stalls = []
+    servers = [
+        uvicorn.Server(uvicorn.Config(build_fake_groq(args.ttft_ms, args.tokens, args.token_ms),
+                                      port=FAKE_GROQ_PORT, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(build_copilot(), port=COPILOT_PORT, log_level="warning")),
+    ]
+    tasks = [asyncio.create_task(s.serve()) for s in servers]
+    probe = asyncio.create_task(loop_probe(stalls))
+    while not all(s.started for s in servers):
+        await asyncio.sleep(0.05)
+    await asyncio.to_thread(get_client)  # main.py warms the client in its lifespan too
+
+    print(f"🚀 {args.clients} concurrent websockets | fake TTFT {args.ttft_ms}ms | {args.tokens} tokens")
+    results = []
+    wall = time.perf_counter()
+    await asyncio.gather(*(run_client(i, results) for i in range(args.clients)))
+    wall = time.perf_counter() - wall
+
+    ttft = [r[0] * 1000 for r in results if r[0] is not None]
+    total = [r[1] * 1000 for r in results]
+    print("-" * 50)
+    print(f"TTFT   p50: {percentile(ttft, 50):8.1f} ms   p99: {percentile(ttft, 99):8.1f} ms")
+    print(f"Answer p50: {percentile(total, 50):8.1f} ms   p99: {percentile(total, 99):8.1f} ms")
+    print(f"Wall clock: {wall * 1000:8.1f} ms   mean TTFT: {statistics.mean(ttft):.1f} ms")
+    print(f"Worst event loop stall: {max(stalls, default=0) * 1000:.1f} ms")
+    print("-" * 50)
+
+    probe.cancel()
+    for s in servers:
+        s.should_exit = True
+    await asyncio.gather(*tasks)
+
+    # A blocking stream would serialize answers, pushing p99 TTFT towards clients * answer time
+    if percentile(ttft, 99) > args.budget_ms:
+        print(f"❌ p99 TTFT above budget ({args.budget_ms}ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=60)
+    parser.add_argument("--ttft-ms", type=int, default=150)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-ms", type=int, default=10)
+    parser.add_argument("--budget-ms", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
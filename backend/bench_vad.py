@@ -0,0 +1,80 @@
+"""
+Benchmark for server-side Silero VAD: per-session calls vs core.vad_service.BatchedVAD.
+
+For 1, 10 and 100 concurrent streams, every stream gets `--seconds` of audio in
+512-sample frames. The per-session path does one forward pass per frame per
+stream (what SmartAudioBuffer.process_frame does). The batched path does one
+pass per tick over the next frame of every stream. Torch is pinned to one
+thread, so frames per CPU second is frames per second per core.
+
+Usage: python bench_vad.py --streams 1 10 100 --seconds 5
+"""
+import time
+import argparse
+
+import numpy as np
+import torch
+
+from core.vad_service import BatchedVAD, CONTEXT_SAMPLES, FRAME_SAMPLES, STATE_SHAPE
+
+SAMPLE_RATE = 16000
+
+
+def per_session(vad, audio):
+    """One (1, 512) pass per frame per stream, each stream with its own state."""
+    states = [np.zeros((STATE_SHAPE[0], 1, STATE_SHAPE[1]), dtype=np.float32) for _ in audio]
+    contexts = [np.zeros((1, CONTEXT_SAMPLES), dtype=np.float32) for _ in audio]
+    for i in range(audio.shape[1]):
+        for s in range(audio.shape[0]):
+            frame = audio[s, i][None, :]
+            _, states[s] = vad.infer(frame, states[s], contexts[s])
+            contexts[s] = frame[:, -CONTEXT_SAMPLES:]
+
+
+def batched(vad, audio):
+    """One (streams, 512) pass per frame index, states kept per stream."""
+    states = np.zeros((STATE_SHAPE[0], audio.shape[0], STATE_SHAPE[1]), dtype=np.float32)
+    contexts = np.zeros((audio.shape[0], CONTEXT_SAMPLES), dtype=np.float32)
+    for i in range(audio.shape[1]):
+        frames = audio[:, i]
+        _, states = vad.infer(frames, states, contexts)
+        contexts = frames[:, -CONTEXT_SAMPLES:]
+
+
+def measure(fn, vad, audio):
+    cpu = time.process_time()
+    fn(vad, audio)
+    cpu = time.process_time() - cpu
+    return audio.shape[0] * audio.shape[1] / cpu
+
+
+def main(args):
+    torch.set_num_threads(1)
+    vad = BatchedVAD()
+    from smart_audio import get_vad_model
+    vad._model = get_vad_model()._model
+
+    # TorchScript profiles the first calls; keep that out of the numbers
+    warmup = np.zeros((4, 20, FRAME_SAMPLES), dtype=np.float32)
+    per_session(vad, warmup)
+    batched(vad, warmup)
+
+    frames = int(args.seconds * SAMPLE_RATE) // FRAME_SAMPLES
+    print(f"🎙️ Silero VAD, {args.seconds}s of audio per stream ({frames} frames), 1 torch thread")
+    print("-" * 78)
+    for streams in args.streams:
+        audio = (np.random.default_rng(0).standard_normal((streams, frames, FRAME_SAMPLES)) * 0.1).astype(np.float32)
+        single = measure(per_session, vad, audio)
+        batch = measure(batched, vad, audio)
+        realtime = batch * FRAME_SAMPLES / SAMPLE_RATE
+        print(f"{streams:>4} streams | per-session {single:8.0f} frames/s/core | "
+              f"batched {batch:8.0f} frames/s/core | x{batch / single:4.1f} | "
+              f"~{realtime:5.0f} real-time streams/core")
+    print("-" * 78)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--seconds", type=float, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,86 @@
+"""
+Import-time regression check for main.py (cold start on every new worker).
+
+Imports main in fresh interpreters and fails (exit 1) when
+- the fastest of --runs imports takes longer than --budget-ms, or
+- one of the SDKs main.py must load on first use (supabase, stripe, groq,
+  openai, deepgram, python-docx, pypdf, torch, faster-whisper) was imported eagerly.
+
+It also prints the slowest imports from `python -X importtime`, so a regression
+points at the module that caused it. No API keys are needed: clients are only
+created on first use.
+
+Usage: python check_import_time.py --budget-ms 900 --runs 3 --top 15
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+LAZY_MODULES = ["supabase", "stripe", "groq", "openai", "deepgram", "docx", "pypdf", "torch", "faster_whisper"]
+
+CHILD = f"""
+import sys, json, time
+started = time.perf_counter()
+import main
+print(json.dumps({{
+    "import_ms": (time.perf_counter() - started) * 1000,
+    "eager": [name for name in {LAZY_MODULES!r} if name in sys.modules],
+}}))
+"""
+
+
+def import_main(importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    env = dict(os.environ, DEEPGRAM_POOL_SIZE="0")
+    proc = subprocess.run(cmd, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"❌ import main failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def slowest_imports(importtime_log, top):
+    """Top-level modules (and their dependencies) by cumulative import time."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(args):
+    runs = [import_main() for _ in range(args.runs)]
+    best = min(result["import_ms"] for result, _ in runs)
+    eager = runs[0][0]["eager"]
+
+    _, log = import_main(importtime=True)
+    print(f"⏱️ import main: best {best:.0f}ms of {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    print("-" * 60)
+    for ms, name in slowest_imports(log, args.top):
+        print(f"{ms:8.1f} ms  {name}")
+    print("-" * 60)
+
+    failed = False
+    if best > args.budget_ms:
+        print(f"❌ import main is over budget by {best - args.budget_ms:.0f}ms")
+        failed = True
+    if eager:
+        print(f"❌ imported at boot instead of on first use: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("✅ import main within budget, heavy SDKs deferred")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "900")))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,162 @@
+# backend/core/billing.py
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger("backend")
+
+# How often accrued usage is written back (one RPC for all users per flush)
+CREDIT_FLUSH_INTERVAL = float(os.getenv("CREDIT_FLUSH_INTERVAL", "15"))
+# A cached balance older than this is re-read before it is trusted for a new session
+CREDIT_BALANCE_TTL = float(os.getenv("CREDIT_BALANCE_TTL", "300"))
+
+
+class CreditLedger:
+    """
+    In-process view of user credit balances.
+    Usage is accrued locally as deltas and written back in one batched RPC
+    (sql/apply_credit_deltas.sql) every CREDIT_FLUSH_INTERVAL seconds, so database
+    load scales with the flush interval instead of with the number of connected users.
+    Deltas (not absolute balances) are sent, which keeps several workers from
+    overwriting each other's writes.
+    """
+    def __init__(self, get_db, flush_interval=CREDIT_FLUSH_INTERVAL, balance_ttl=CREDIT_BALANCE_TTL):
+        self.get_db = get_db  # returns the Supabase client (created on first use)
+        self.flush_interval = flush_interval
+        self.balance_ttl = balance_ttl
+
+        self._confirmed = {}  # user_id -> (balance from DB, loaded_at)
+        self._pending = defaultdict(int)  # user_id -> minutes delta not yet written
+        self._inflight = {}  # user_id -> minutes delta sent by the running flush, not yet confirmed
+        self._flush_lock = asyncio.Lock()
+
+        # Metrics
+        self.reads = 0
+        self.flushes = 0
+        self.flushed_users = 0
+        self.flush_errors = 0
+        self.stale_reads = 0  # DB reads dropped because a newer flush result was already cached
+        self.evicted = 0
+
+    # --- READS ---
+    async def get_balance(self, user_id: str, refresh: bool = False) -> int:
+        """Local balance: last DB value plus deltas not yet confirmed by a flush."""
+        cached = self._confirmed.get(user_id)
+        if refresh or cached is None or time.monotonic() - cached[1] > self.balance_ttl:
+            read_at = time.monotonic()  # taken before the read, so a flush that lands meanwhile wins
+            res = await asyncio.to_thread(
+                lambda: self.get_db().table("user_credits").select("balance_minutes").eq("user_id", user_id).single().execute()
+            )
+            self.reads += 1
+            current = self._confirmed.get(user_id)
+            if current is None or current[1] <= read_at:
+                self._confirmed[user_id] = (res.data.get("balance_minutes", 0), read_at)
+            else:
+                self.stale_reads += 1
+        return self.cached_balance(user_id)
+
+    def cached_balance(self, user_id: str):
+        cached = self._confirmed.get(user_id)
+        if cached is None:
+            return None
+        return cached[0] + self._inflight.get(user_id, 0) + self._pending.get(user_id, 0)
+
+    # --- WRITES (local, flushed in batches) ---
+    async def charge(self, user_id: str, minutes: int) -> int:
+        """Accrue usage and return the new local balance."""
+        await self.get_balance(user_id)
+        self._pending[user_id] -= minutes
+        return self.cached_balance(user_id)
+
+    async def try_debit(self, user_id: str, minutes: int):
+        """Debit only if the balance covers it. Returns (ok, balance)."""
+        balance = await self.get_balance(user_id)
+        if balance < minutes:
+            return False, balance
+        # No await between the check and the debit, so two requests can't both pass
+        self._pending[user_id] -= minutes
+        return True, balance - minutes
+
+    def credit(self, user_id: str, minutes: int):
+        """Refunds and top-ups. Call flush() afterwards if it must be durable right away."""
+        self._pending[user_id] += minutes
+
+    # --- FLUSHING ---
+    async def flush(self) -> dict:
+        """Write pending deltas back. Returns {user_id: balance} as reported by the RPC."""
+        async with self._flush_lock:
+            batch = {user_id: delta for user_id, delta in self._pending.items() if delta}
+            if not batch:
+                return {}
+            # Moved, not dropped: balances keep counting them until the RPC confirms
+            for user_id, delta in batch.items():
+                self._pending[user_id] -= delta
+            self._inflight = batch
+
+            payload = [{"user_id": user_id, "delta": delta} for user_id, delta in batch.items()]
+            try:
+                res = await asyncio.to_thread(
+                    lambda: self.get_db().rpc("apply_credit_deltas", {"deltas": payload}).execute()
+                )
+            except Exception as e:
+                # Put the deltas back; they go out with the next flush
+                for user_id, delta in batch.items():
+                    self._pending[user_id] += delta
+                self._inflight = {}
+                self.flush_errors += 1
+                logger.error(f"⚠️ Credit flush failed ({len(batch)} users): {e}")
+                return {}
+
+            now = time.monotonic()
+            balances = {str(row["user_id"]): row["balance_minutes"] for row in res.data or []}
+            for user_id, balance in balances.items():
+                self._confirmed[user_id] = (balance, now)
+            self._inflight = {}
+            for user_id in batch:
+                if not self._pending.get(user_id):
+                    self._pending.pop(user_id, None)
+
+            self.flushes += 1
+            self.flushed_users += len(batch)
+            logger.info(f"💳 Flushed credit deltas for {len(batch)} users")
+            return balances
+
+    async def run(self):
+        """Background flush loop, started from the app lifespan."""
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+            except asyncio.CancelledError:
+                break
+            await self.flush()
+            self.evict_stale()
+
+    def evict_stale(self):
+        """Drop cached balances past their TTL (they'd be re-read anyway) for users with no unflushed usage."""
+        cutoff = time.monotonic() - self.balance_ttl
+        stale = [user_id for user_id, (_, loaded_at) in self._confirmed.items()
+                 if loaded_at < cutoff and not self._pending.get(user_id) and user_id not in self._inflight]
+        for user_id in stale:
+            del self._confirmed[user_id]
+        self.evicted += len(stale)
+
+    def forget(self, user_id: str):
+        """Drop the cached balance of a user with no unflushed usage (e.g. after disconnect)."""
+        if not self._pending.get(user_id) and user_id not in self._inflight:
+            self._confirmed.pop(user_id, None)
+
+    def stats(self):
+        return {
+            "cached_users": len(self._confirmed),
+            "pending_users": sum(1 for delta in self._pending.values() if delta),
+            "pending_minutes": sum(self._pending.values()),
+            "inflight_users": len(self._inflight),
+            "evicted": self.evicted,
+            "reads": self.reads,
+            "flushes": self.flushes,
+            "flushed_users": self.flushed_users,
+            "flush_errors": self.flush_errors,
+            "stale_reads": self.stale_reads,
+        }
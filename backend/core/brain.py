@@ -1,14 +1,39 @@
 # backend/core/brain.py
-import logging
+import os
+import re
+import hashlib
+from collections import deque
+
+from core.tokens import count_tokens, count_message_tokens
+from core.retrieval import ResumeIndex, RETRIEVAL_TOP_K
+
+# History is trimmed by size, not message count (tune per model / cost target)
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+# Evicted turns are folded into a short rolling summary (set to 0 to disable)
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "200"))
+# Above this much resume + job text, only the sections relevant to each question are sent
+RETRIEVAL_MIN_CHARS = int(os.getenv("RETRIEVAL_MIN_CHARS", "3000"))
+
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)", re.S)
 
 class Brain:
     def __init__(self):
         # Conversation History
         self.history = []
+        self.history_tokens = []  # token estimate per history message
+        self.summary = ""  # rolling summary of turns that fell out of the window
+
+        # Prompt Accounting
+        self._system_prompt = None  # cached until set_context changes it
+        self.last_prompt_tokens = 0
+        self.prompt_token_log = deque(maxlen=50)
         
         # Context (The "Knowledge")
         self.resume = ""
         self.job_description = ""
+        self.index = None  # ResumeIndex, only built for long contexts
+        self.context_key = ""  # fingerprint of resume + job, ties pre-generated answers to them
+        self.prepared = {}  # common question -> answer generated for this context (core/prepared.py)
         
         # Default Prompt
         self.default_system_prompt = """
@@ -28,34 +53,145 @@ Your job is to listen to the live interview and instantly provide the candidate
         """Save the uploaded resume and job description."""
         self.resume = resume_text
         self.job_description = job_text
+        key = self._context_key()
+        if key != self.context_key:
+            self.context_key = key
+            self.prepared = {}
         # Clear history when context changes (New Interview)
-        self.history = [] 
+        self.history = []
+        self.history_tokens = []
+        self.summary = ""
+        self._system_prompt = None
+        self._build_index()
 
-    def build_system_prompt(self):
-        """Create a prompt that includes the Resume and Job context."""
-        
+    def _context_key(self):
+        return hashlib.sha1(f"{self.resume}\0{self.job_description}".encode()).hexdigest()
+
+    def _build_index(self):
+        if len(self.resume) + len(self.job_description) > RETRIEVAL_MIN_CHARS:
+            self.index = ResumeIndex(self.resume, self.job_description)
+        else:
+            self.index = None
+
+    def build_system_prompt(self, question=None):
+        """
+        Create a prompt that includes the Resume and Job context.
+        Short contexts are rendered once and cached; long ones are narrowed to
+        the sections relevant to `question`.
+        """
+        if self.index is not None and question:
+            return self._render_system_prompt(
+                self.index.top_k(question, k=RETRIEVAL_TOP_K, source="resume"),
+                self.index.top_k(question, k=RETRIEVAL_TOP_K, source="job"),
+            )
+        if self._system_prompt is None:
+            self._system_prompt = self._render_system_prompt(self.resume, self.job_description)
+        return self._system_prompt
+
+    def _render_system_prompt(self, resume_text, job_text):
         # Start with the base instructions
         prompt = self.default_system_prompt
         
         # Add Resume Context if available
-        if self.resume:
-            prompt += f"\n\nCANDIDATE RESUME:\n{self.resume}"
+        if resume_text:
+            prompt += f"\n\nCANDIDATE RESUME:\n{resume_text}"
             
         # Add Job Context if available
-        if self.job_description:
-            prompt += f"\n\nJOB DESCRIPTION:\n{self.job_description}"
+        if job_text:
+            prompt += f"\n\nJOB DESCRIPTION:\n{job_text}"
             
         # Add Final Instruction
         prompt += "\n\nINSTRUCTION: Using the candidate's resume above, formulate the best possible answer to the interviewer's question."
         
         return prompt
 
+    def build_messages(self, question, record=True):
+        """
+        Full chat payload for one turn. Records its token count in last_prompt_tokens,
+        unless record=False (a speculative answer that may be dropped; see record_prompt).
+        """
+        # Follow-ups ("tell me more") lean on the previous question for retrieval
+        query = question
+        if self.history:
+            query = f"{self.history[-2]['content']} {question}"
+        messages = [{"role": "system", "content": self.build_system_prompt(query)}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"EARLIER IN THIS INTERVIEW:\n{self.summary}"})
+        messages.extend(self.history)
+        messages.append({"role": "user", "content": question})
+        if record:
+            self.record_prompt(messages)
+        return messages
+
+    def record_prompt(self, messages):
+        """Counts a payload that was actually answered into last_prompt_tokens and the log."""
+        self.last_prompt_tokens = count_message_tokens(messages)
+        self.prompt_token_log.append(self.last_prompt_tokens)
+
+    def build_standalone_messages(self, question):
+        """Payload for a question asked with no interview history (pre-generated answers)."""
+        return [
+            {"role": "system", "content": self.build_system_prompt(question)},
+            {"role": "user", "content": question},
+        ]
+
     def add_interaction(self, user_text, ai_text):
         self.history.append({"role": "user", "content": user_text})
         self.history.append({"role": "assistant", "content": ai_text})
-        
-        # --- THE SAFETY VALVE (Sliding Window) ---
-        # Keep only the last 10 exchanges (20 messages total)
-        # This prevents the context window from overflowing during long interviews
-        if len(self.history) > 20:
-            self.history = self.history[-20:]
\ No newline at end of file
+        self.history_tokens.append(count_tokens(user_text))
+        self.history_tokens.append(count_tokens(ai_text))
+
+        # --- THE SAFETY VALVE (Token-Budgeted Window) ---
+        # Drop the oldest exchanges until the history fits the token budget,
+        # but always keep the latest exchange so follow-ups have context
+        while len(self.history) > 2 and sum(self.history_tokens) > HISTORY_TOKEN_BUDGET:
+            question, answer = self.history[0]["content"], self.history[1]["content"]
+            del self.history[:2]
+            del self.history_tokens[:2]
+            self._summarize(question, answer)
+
+    def _summarize(self, question, answer):
+        """Fold an evicted exchange into the rolling summary (extractive, no LLM call)."""
+        if SUMMARY_TOKEN_BUDGET <= 0:
+            return
+        match = _FIRST_SENTENCE.match(answer.strip())
+        gist = match.group(1) if match else answer.strip()
+        line = f"- Q: {question.strip()[:120]} | A: {gist[:160]}"
+        lines = (self.summary.splitlines() if self.summary else []) + [line]
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > SUMMARY_TOKEN_BUDGET:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+
+    def approx_bytes(self):
+        """Rough memory footprint, used by the session cache budget."""
+        size = len(self.resume) + len(self.job_description) + len(self.default_system_prompt)
+        for msg in self.history:
+            size += len(msg["content"])
+        size += len(self.summary)
+        size += sum(len(answer) for answer in self.prepared.values())
+        if self.index is not None:
+            size += self.index.nbytes()
+        return size
+
+    def to_dict(self):
+        """Serializable state for sharing sessions across workers."""
+        return {
+            "resume": self.resume,
+            "job_description": self.job_description,
+            "history": self.history,
+            "summary": self.summary,
+            "prepared": self.prepared,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        brain = cls()
+        brain.resume = state.get("resume", "")
+        brain.job_description = state.get("job_description", "")
+        brain.history = state.get("history", [])
+        brain.history_tokens = [count_tokens(msg["content"]) for msg in brain.history]
+        brain.summary = state.get("summary", "")
+        brain.context_key = brain._context_key()
+        brain.prepared = state.get("prepared", {})
+        brain._build_index()
+        return brain
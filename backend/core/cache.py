@@ -0,0 +1,274 @@
+# backend/core/cache.py
+import os
+import time
+import json
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("backend")
+
+
+class LRUCache:
+    """
+    In-process LRU cache with an optional TTL and a byte budget.
+    `sizeof(value)` is used to charge each entry against `max_bytes`.
+    With `sliding_ttl=True` the TTL counts from the last access (idle timeout),
+    otherwise from when the value was stored.
+    """
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None, sizeof=None, sliding_ttl=False, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof or (lambda value: 0)
+        self.sliding_ttl = sliding_ttl
+        self.on_evict = on_evict
+
+        self._data = OrderedDict()  # key -> [value, size, expires_at]
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[2] is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if self.sliding_ttl and self.ttl:
+                entry[2] = time.monotonic() + self.ttl
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        """Store (or re-measure) a value and evict until we are back under budget."""
+        size = self.sizeof(value)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        evicted = []
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._data[key][1]
+            self._data[key] = [value, size, expires_at]
+            self._data.move_to_end(key)
+            self.total_bytes += size
+            evicted = self._shrink(keep=key)
+        self._notify(evicted)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._remove(key)
+        return entry[0] if entry else default
+
+    def sweep(self):
+        """Drop expired entries. Cheap enough to call on every request."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, entry in list(self._data.items()):
+                if entry[2] is not None and entry[2] < now:
+                    expired.append((key, self._remove(key)[0]))
+            self.expirations += len(expired)
+        self._notify(expired)
+
+    def _shrink(self, keep=None):
+        evicted = []
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            if oldest == keep:
+                # A single entry bigger than the whole budget still gets to live alone
+                if len(self._data) == 1:
+                    break
+                self._data.move_to_end(oldest)
+                continue
+            evicted.append((oldest, self._remove(oldest)[0]))
+            self.evictions += 1
+        return evicted
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry:
+            self.total_bytes -= entry[1]
+        return entry
+
+    def _notify(self, removed):
+        if self.on_evict:
+            for key, value in removed:
+                self.on_evict(key, value)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteStore:
+    """
+    Tiny JSON key/value table on a local SQLite file.
+    WAL mode lets several uvicorn workers on the same box share it.
+    """
+    def __init__(self, path, table="kv"):
+        self.path = path
+        self.table = table
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key, max_age=None):
+        entry = self.get_entry(key, max_age=max_age)
+        return entry[0] if entry else None
+
+    def get_entry(self, key, max_age=None, newer_than=None):
+        """(value, updated_at), or None when missing, expired or not written after `newer_than`."""
+        query, params = f"SELECT value, updated_at FROM {self.table} WHERE key = ?", (key,)
+        if newer_than is not None:
+            query, params = f"{query} AND updated_at > ?", (key, newer_than)
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        if max_age is not None and row[1] < time.time() - max_age:
+            self.delete(key)
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value):
+        """Returns the row's updated_at."""
+        payload = json.dumps(value)
+        updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, updated_at) VALUES (?, ?, ?)",
+                (key, payload, updated_at),
+            )
+            self._conn.commit()
+        return updated_at
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def prune(self, max_age=None, max_rows=None):
+        """Delete rows older than `max_age` seconds and keep only the newest `max_rows`."""
+        with self._lock:
+            if max_age is not None:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE updated_at < ?", (time.time() - max_age,))
+            if max_rows is not None:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key NOT IN "
+                    f"(SELECT key FROM {self.table} ORDER BY updated_at DESC LIMIT ?)",
+                    (max_rows,),
+                )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class PersistentCache:
+    """
+    LRUCache in front of a SQLiteStore: hot keys are served from memory,
+    everything else survives restarts and is shared between workers.
+    Entries expire `ttl` seconds after being written; the table is capped at `max_rows`.
+    The SQLite file is opened by open() (the app lifespan runs it on a worker thread)
+    and all disk reads, writes and prunes go through asyncio.to_thread.
+    """
+    PRUNE_EVERY = 50  # writes between table prunes
+
+    def __init__(self, path, table, ttl, max_rows, max_memory_entries=256):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.memory = LRUCache(max_entries=max_memory_entries, ttl=ttl)
+        self.store = None
+        self._open_lock = threading.Lock()
+        self._writes = 0
+        self.disk_hits = 0
+
+    def open(self):
+        """Blocking: create/open the table and prune it. Safe to call more than once."""
+        with self._open_lock:
+            if self.store is None:
+                store = SQLiteStore(self.path, table=self.table)
+                store.prune(max_age=self.ttl, max_rows=self.max_rows)
+                self.store = store
+        return self.store
+
+    def _read(self, key):
+        return self.open().get(key, max_age=self.ttl)
+
+    def _write(self, key, value, prune):
+        store = self.open()
+        store.set(key, value)
+        if prune:
+            store.prune(max_age=self.ttl, max_rows=self.max_rows)
+
+    async def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        try:
+            value = await asyncio.to_thread(self._read, key)
+        except Exception as e:
+            logger.error(f"⚠️ Cache read failed ({self.table}): {e}")
+            return None
+        if value is not None:
+            self.disk_hits += 1
+            self.memory.set(key, value)
+        return value
+
+    async def set(self, key, value):
+        self.memory.set(key, value)
+        self._writes += 1
+        try:
+            await asyncio.to_thread(self._write, key, value, self._writes % self.PRUNE_EVERY == 0)
+        except Exception as e:
+            logger.error(f"⚠️ Cache write failed ({self.table}): {e}")
+
+    def stats(self):
+        memory = self.memory.stats()
+        return {
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": memory["misses"] - self.disk_hits,
+            "memory_entries": memory["entries"],
+        }
@@ -0,0 +1,274 @@
+# backend/core/coach.py
+import os
+import json
+import asyncio
+import secrets
+import logging
+from collections import deque
+
+from core.cache import LRUCache, SQLiteStore
+from core.retrieval import relevant_text
+from core.sessions import SESSION_BACKEND, SESSION_DB_PATH
+from core.tokens import count_tokens, count_message_tokens
+
+logger = logging.getLogger("backend")
+
+COACH_MAX_SESSIONS = int(os.getenv("COACH_MAX_SESSIONS", "1000"))
+COACH_SESSION_TTL = int(os.getenv("COACH_SESSION_TTL", str(2 * 60 * 60)))  # idle seconds
+# Latest answered turns sent verbatim with each reply; older ones only as a summary line
+COACH_RECENT_TURNS = int(os.getenv("COACH_RECENT_TURNS", "2"))
+COACH_SUMMARY_TOKEN_BUDGET = int(os.getenv("COACH_SUMMARY_TOKEN_BUDGET", "300"))
+# Per-answer cap in the final scorecard transcript
+COACH_END_ANSWER_CHARS = int(os.getenv("COACH_END_ANSWER_CHARS", "600"))
+
+
+def get_difficulty_instruction(level: str):
+    if level == "Easy":
+        return "Ask standard behavioral questions (e.g., 'Tell me about yourself'). Be encouraging."
+    elif level == "Medium":
+        return "Ask standard technical questions relevant to the resume. Be professional."
+    elif level == "Hard":
+        return "Ask very difficult, deep technical questions and edge cases. Be skeptical."
+    return "Ask standard questions."
+
+
+def reply_prompt(difficulty, job_text, resume_text):
+    # UPDATED: We explicitly demand a JSON structure.
+    return f"""
+        You are a strict but helpful Interview Coach.
+        Difficulty Level: {difficulty}
+        {get_difficulty_instruction(difficulty)}
+
+        Job Description: {job_text}
+        Resume: {resume_text}
+
+        The user just answered your question.
+        1. Analyze their answer against their resume.
+        2. Give a short rating (Poor/Good/Excellent).
+        3. Provide 1 sentence of specific feedback.
+        4. Ask the NEXT question based on the difficulty level.
+
+        CRITICAL: You MUST respond ONLY with a valid JSON object in the exact format below. Do not include markdown code blocks, just raw JSON.
+        {{
+            "rating": "[Poor/Good/Excellent]",
+            "feedback": "Your 1 sentence feedback here.",
+            "next_question": "Your next question here."
+        }}
+        """
+
+
+def end_prompt(resume_text):
+    return f"""
+        You are a strict but helpful Interview Coach. The interview is now OVER.
+        Generate a final Scorecard based on the candidate's answers.
+        Resume Context: {resume_text}
+
+        CRITICAL: You MUST respond ONLY with a valid JSON object in the exact format below.
+        Do not ask any more questions. Do not include markdown code blocks.
+        {{
+            "overall_score": 75,
+            "summary": "A 2-sentence overall summary of their performance highlighting their main strength.",
+            "areas_of_improvement": [
+                "First specific actionable bullet point.",
+                "Second specific actionable bullet point.",
+                "Third specific actionable bullet point."
+            ]
+        }}
+        """
+
+
+class CoachSession:
+    """
+    One mock interview, kept on the server from /coach/start to /coach/end.
+    Holds the parsed resume, every turn with its rating, and a bounded summary
+    of the turns that fell out of the recent window, so a reply only needs the
+    new answer and its prompt stops growing with the interview.
+    """
+    def __init__(self, session_id, user_id, resume, job_description, difficulty, question):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.resume = resume
+        self.job_description = job_description
+        self.difficulty = difficulty
+        self.question = question  # the open question, waiting for an answer
+        self.turns = []  # {"question", "answer", "rating", "feedback"}
+        self.summary = ""  # one line per turn older than COACH_RECENT_TURNS
+
+    # --- PROMPTS ---
+    def build_reply_messages(self, answer):
+        focus = f"{self.question} {answer}"
+        messages = [{"role": "system", "content": reply_prompt(
+            self.difficulty,
+            relevant_text(self.job_description, focus, 500),
+            relevant_text(self.resume, focus, 1000),
+        )}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"EARLIER IN THIS INTERVIEW:\n{self.summary}"})
+        for turn in self.turns[max(0, len(self.turns) - COACH_RECENT_TURNS):]:
+            messages.append({"role": "assistant", "content": turn["question"]})
+            messages.append({"role": "user", "content": turn["answer"]})
+        messages.append({"role": "assistant", "content": self.question})
+        messages.append({"role": "user", "content": answer})
+        return messages
+
+    def build_end_messages(self, answer=""):
+        turns = self.turns + ([{"question": self.question, "answer": answer}] if answer else [])
+        lines = []
+        for number, turn in enumerate(turns, 1):
+            lines.append(f"Q{number}: {turn['question']}")
+            lines.append(f"A{number}: {turn['answer'][:COACH_END_ANSWER_CHARS]}")
+            if turn.get("rating"):
+                lines.append(f"Coach rating: {turn['rating']} - {turn.get('feedback', '')}")
+        transcript = "\n".join(lines)
+        return [
+            {"role": "system", "content": end_prompt(relevant_text(self.resume, transcript, 500))},
+            {"role": "user", "content": f"INTERVIEW TRANSCRIPT:\n{transcript}"},
+        ]
+
+    # --- TURNS ---
+    def record_reply(self, answer, content):
+        """Store the answered turn and move on to the coach's next question."""
+        try:
+            reply = json.loads(content)
+        except (TypeError, ValueError):
+            reply = {}
+        if not isinstance(reply, dict):
+            reply = {}
+        self.turns.append({
+            "question": self.question,
+            "answer": answer,
+            "rating": str(reply.get("rating", "")),
+            "feedback": str(reply.get("feedback", "")),
+        })
+        self.question = str(reply.get("next_question") or content)
+        if len(self.turns) > COACH_RECENT_TURNS:
+            self._summarize(self.turns[-COACH_RECENT_TURNS - 1])
+
+    def _summarize(self, turn):
+        """Fold a turn that left the recent window into the summary (no LLM call)."""
+        line = f"- Q: {turn['question'].strip()[:120]} | A: {turn['answer'].strip()[:160]} | Rating: {turn['rating']}"
+        lines = (self.summary.splitlines() if self.summary else []) + [line]
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > COACH_SUMMARY_TOKEN_BUDGET:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+
+    def approx_bytes(self):
+        size = len(self.resume) + len(self.job_description) + len(self.question) + len(self.summary)
+        for turn in self.turns:
+            size += sum(len(value) for value in turn.values())
+        return size
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "resume": self.resume,
+            "job_description": self.job_description,
+            "difficulty": self.difficulty,
+            "question": self.question,
+            "turns": self.turns,
+            "summary": self.summary,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        session = cls(state["session_id"], state.get("user_id", ""), state.get("resume", ""),
+                      state.get("job_description", ""), state.get("difficulty", "Medium"), state.get("question", ""))
+        session.turns = state.get("turns", [])
+        session.summary = state.get("summary", "")
+        return session
+
+
+class CoachSessionStore:
+    """
+    Coach sessions by id: LRU + idle TTL in memory, written through to the
+    shared backend (SESSION_BACKEND=sqlite) so any worker can continue them.
+    Backend I/O runs on worker threads.
+    """
+    def __init__(self, max_sessions=COACH_MAX_SESSIONS, idle_ttl=COACH_SESSION_TTL, backend=None):
+        self.idle_ttl = idle_ttl
+        self.backend = backend
+        self.cache = LRUCache(
+            max_entries=max_sessions,
+            ttl=idle_ttl,
+            sizeof=lambda session: session.approx_bytes(),
+            sliding_ttl=True,
+        )
+
+        # Metrics
+        self.created = 0
+        self.restored = 0
+        self.expired = 0
+        self.ended = 0
+        self.prompt_tokens = deque(maxlen=500)  # per /coach/reply prompt
+
+    async def create(self, user_id, resume, job_description, difficulty, question) -> CoachSession:
+        session = CoachSession(secrets.token_urlsafe(16), user_id, resume, job_description, difficulty, question)
+        self.created += 1
+        await self.save(session)
+        logger.info(f"🎓 Coach session {session.session_id} started for user: {user_id}")
+        return session
+
+    async def get(self, session_id):
+        """The session, or None once it expired or was ended."""
+        self.cache.sweep()
+        session = self.cache.get(session_id)
+        if session is not None:
+            return session
+
+        state = None
+        if self.backend is not None:
+            try:
+                state = await asyncio.to_thread(self.backend.get, session_id, self.idle_ttl)
+            except Exception as e:
+                logger.error(f"⚠️ Coach session backend read failed for {session_id}: {e}")
+        if state is None:
+            self.expired += 1
+            return None
+        session = CoachSession.from_dict(state)
+        self.restored += 1
+        self.cache.set(session_id, session)
+        return session
+
+    async def save(self, session):
+        """Call after every turn so the size and the shared backend stay current."""
+        self.cache.set(session.session_id, session)
+        if self.backend is not None:
+            state = session.to_dict()  # snapshot on the loop, written on a worker thread
+            try:
+                await asyncio.to_thread(self.backend.set, session.session_id, state)
+            except Exception as e:
+                logger.error(f"⚠️ Coach session backend write failed for {session.session_id}: {e}")
+
+    async def end(self, session):
+        self.cache.pop(session.session_id)
+        self.ended += 1
+        if self.backend is not None:
+            try:
+                await asyncio.to_thread(self.backend.delete, session.session_id)
+            except Exception as e:
+                logger.error(f"⚠️ Coach session backend delete failed for {session.session_id}: {e}")
+
+    def record_prompt(self, messages):
+        self.prompt_tokens.append(count_message_tokens(messages))
+
+    def stats(self):
+        tokens = sorted(self.prompt_tokens)
+        return {
+            **self.cache.stats(),
+            "created": self.created,
+            "restored": self.restored,
+            "expired": self.expired,
+            "ended": self.ended,
+            "reply_prompt_tokens_avg": round(sum(tokens) / len(tokens), 1) if tokens else 0.0,
+            "reply_prompt_tokens_max": tokens[-1] if tokens else 0,
+            "backend": type(self.backend).__name__ if self.backend is not None else "memory",
+        }
+
+
+def create_coach_store() -> CoachSessionStore:
+    backend = None
+    if SESSION_BACKEND == "sqlite":
+        backend = SQLiteStore(SESSION_DB_PATH, table="coach_sessions")
+        backend.prune(max_age=COACH_SESSION_TTL)
+    return CoachSessionStore(backend=backend)
@@ -0,0 +1,218 @@
+# backend/core/deepgram_pool.py
+import os
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.timing import lazy_import
+
+logger = logging.getLogger("backend")
+
+# Point at a local mock (e.g. "http://127.0.0.1:8765") to load test without Deepgram
+DEEPGRAM_URL = os.getenv("DEEPGRAM_URL", "api.deepgram.com")
+# Live connections kept open and ready for the next /ws session (0 disables pre-warming)
+DEEPGRAM_POOL_SIZE = int(os.getenv("DEEPGRAM_POOL_SIZE", "2"))
+# Idle pooled connections older than this are recycled before Deepgram drops them
+DEEPGRAM_POOL_MAX_IDLE = float(os.getenv("DEEPGRAM_POOL_MAX_IDLE", "300"))
+# Handshakes in flight at once, so a burst of joins doesn't open a burst of TLS sessions
+DEEPGRAM_CONNECT_CONCURRENCY = int(os.getenv("DEEPGRAM_CONNECT_CONCURRENCY", "8"))
+
+
+def live_options():
+    """Options every live session uses; they are part of the URL, so pooled sockets must match."""
+    return lazy_import("deepgram").LiveOptions(
+        model="nova-2",
+        language="en-US",
+        smart_format=True,
+        interim_results=True,
+        utterance_end_ms="1000",
+    )
+
+
+class DeepgramPool:
+    """
+    One shared DeepgramClient plus a few pre-started live connections.
+    /ws sessions take a connection that already finished its TLS + websocket
+    handshake; the pool refills in the background. Idle connections are kept
+    open with the SDK's KeepAlive thread and recycled after DEEPGRAM_POOL_MAX_IDLE.
+    A live connection carries one audio stream, so it is closed after use, not returned.
+    """
+    def __init__(self, api_key, url=DEEPGRAM_URL, size=DEEPGRAM_POOL_SIZE,
+                 max_idle=DEEPGRAM_POOL_MAX_IDLE, connect_concurrency=DEEPGRAM_CONNECT_CONCURRENCY):
+        self.api_key = api_key
+        self.url = url
+        self.size = size
+        self.max_idle = max_idle
+        self._client = None
+        self._client_lock = threading.Lock()  # pre-warm threads may all ask for the client at once
+        self._idle = deque()  # (connection, opened_at)
+        self._live = weakref.WeakSet()  # connections started and not yet closed or failed
+        self._warming = 0
+        self._warm_tasks = set()
+        self._release_tasks = set()
+        self._connect_slots = asyncio.Semaphore(connect_concurrency)
+        # finish() sleeps and joins SDK threads for seconds; keep that off the shared to_thread pool
+        self._closer = ThreadPoolExecutor(max_workers=16, thread_name_prefix="deepgram-close")
+
+        # Metrics
+        self.acquired = 0
+        self.pool_hits = 0
+        self.exhausted = 0
+        self.connect_failures = 0
+        self.recycled = 0
+        self.acquire_ms = deque(maxlen=500)
+        self.connect_ms = deque(maxlen=500)
+
+    @property
+    def client(self):
+        """Shared DeepgramClient; the SDK is imported on first use (on the pre-warm thread)."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    deepgram = lazy_import("deepgram")
+                    # keepalive=true makes the SDK send KeepAlive every few seconds, so idle
+                    # pooled sockets (and quiet sessions) aren't closed by Deepgram's 10s timeout
+                    # (SDK 3.1 reads the key from the options object once one is passed)
+                    config = deepgram.DeepgramClientOptions(api_key=self.api_key or "", url=self.url,
+                                                            verbose=logging.WARNING, options={"keepalive": "true"})
+                    self._client = deepgram.DeepgramClient(config=config)
+        return self._client
+
+    # --- CONNECTIONS ---
+    def _open(self):
+        """Blocking: the SDK's start() does the handshake on the calling thread."""
+        events = lazy_import("deepgram").LiveTranscriptionEvents
+        connection = self.client.listen.live.v("1")
+        # Our own view of the socket: a failed listener or keepalive reports an Error
+        # (SDK 3.1 emits no Open/Close; newer ones do, and are tracked the same way)
+        connection.on(events.Open, lambda conn, *args, **kwargs: self._live.add(conn))
+        for event in (events.Close, events.Error):
+            connection.on(event, lambda conn, *args, **kwargs: self._live.discard(conn))
+        if connection.start(live_options()) is False:
+            raise ConnectionError("Deepgram refused the live connection")
+        self._live.add(connection)
+        return connection
+
+    async def _connect(self):
+        started = time.perf_counter()
+        try:
+            connection = await asyncio.to_thread(self._open)
+        except Exception:
+            self.connect_failures += 1
+            raise
+        self.connect_ms.append((time.perf_counter() - started) * 1000)
+        return connection
+
+    def _is_open(self, connection) -> bool:
+        return connection in self._live
+
+    async def acquire(self):
+        """Returns a started live connection; register handlers with .on() after taking it."""
+        started = time.perf_counter()
+        connection = None
+        while self._idle:
+            candidate, opened_at = self._idle.popleft()
+            if self._is_open(candidate) and time.monotonic() - opened_at < self.max_idle:
+                connection = candidate
+                self.pool_hits += 1
+                break
+            self.recycled += 1
+            self._release_later(candidate)
+
+        self._top_up()
+        if connection is None:
+            if self.size > 0:
+                self.exhausted += 1
+                logger.warning("🎧 Deepgram pool empty, connecting on demand")
+            # Not behind _connect_slots: a waiting user goes ahead of background pre-warming
+            connection = await self._connect()
+
+        self.acquired += 1
+        self.acquire_ms.append((time.perf_counter() - started) * 1000)
+        return connection
+
+    async def release(self, connection):
+        """Close a connection after its session (finish() blocks for the SDK's thread joins)."""
+        if connection is None:
+            return
+        self._live.discard(connection)
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._closer, connection.finish)
+        except Exception as e:
+            logger.warning(f"Deepgram finish failed: {e}")
+
+    def _release_later(self, connection):
+        """release() in the background, holding the task so it isn't collected mid-close."""
+        task = asyncio.create_task(self.release(connection))
+        self._release_tasks.add(task)
+        task.add_done_callback(self._release_tasks.discard)
+
+    # --- BACKGROUND REFILL ---
+    def _top_up(self):
+        """Start one pre-warm per missing connection; each joins the pool as soon as it is up."""
+        missing = self.size - len(self._idle) - self._warming
+        for _ in range(max(missing, 0)):
+            self._warming += 1
+            task = asyncio.create_task(self._prewarm())
+            self._warm_tasks.add(task)
+            task.add_done_callback(self._warm_tasks.discard)
+
+    async def _prewarm(self):
+        try:
+            async with self._connect_slots:
+                connection = await self._connect()
+            self._idle.append((connection, time.monotonic()))
+        except Exception as e:
+            logger.error(f"⚠️ Deepgram pre-warm failed: {e}")
+        finally:
+            self._warming -= 1
+
+    def _recycle_stale(self):
+        now = time.monotonic()
+        fresh = deque()
+        for connection, opened_at in self._idle:
+            if now - opened_at < self.max_idle and self._is_open(connection):
+                fresh.append((connection, opened_at))
+            else:
+                self.recycled += 1
+                self._release_later(connection)
+        self._idle = fresh
+
+    async def run(self):
+        """Fills the pool, then recycles idle sockets and replaces failed pre-warms; started from the app lifespan."""
+        if self.size <= 0:
+            return
+        check_every = min(max(self.max_idle / 4, 1), 30)
+        while True:
+            self._recycle_stale()
+            self._top_up()
+            try:
+                await asyncio.sleep(check_every)
+            except asyncio.CancelledError:
+                break
+
+    async def close(self):
+        for task in list(self._warm_tasks):
+            task.cancel()
+        idle, self._idle = list(self._idle), deque()
+        await asyncio.gather(*(self.release(connection) for connection, _ in idle), *self._release_tasks)
+
+    def stats(self):
+        acquire_ms = sorted(self.acquire_ms)
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "warming": self._warming,
+            "acquired": self.acquired,
+            "pool_hits": self.pool_hits,
+            "exhausted": self.exhausted,
+            "connect_failures": self.connect_failures,
+            "recycled": self.recycled,
+            "acquire_p50_ms": round(acquire_ms[len(acquire_ms) // 2], 1) if acquire_ms else 0.0,
+            "acquire_p95_ms": round(acquire_ms[int(len(acquire_ms) * 0.95)], 1) if acquire_ms else 0.0,
+            "avg_connect_ms": round(sum(self.connect_ms) / len(self.connect_ms), 1) if self.connect_ms else 0.0,
+        }
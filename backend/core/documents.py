@@ -0,0 +1,91 @@
+# backend/core/documents.py
+import io
+import os
+import hashlib
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.cache import LRUCache
+
+logger = logging.getLogger("backend")
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_CACHE_BYTES = int(os.getenv("EXTRACT_CACHE_BYTES", str(16 * 1024 * 1024)))
+EXTRACT_CACHE_TTL = int(os.getenv("EXTRACT_CACHE_TTL", str(24 * 60 * 60)))
+
+# sha256(file bytes) + parser kind -> extracted text
+_text_cache = LRUCache(max_entries=2000, max_bytes=EXTRACT_CACHE_BYTES, ttl=EXTRACT_CACHE_TTL, sizeof=len)
+_pool = None
+
+
+def _parser_kind(filename: str) -> str:
+    if filename.endswith(".pdf"):
+        return "pdf"
+    if filename.endswith(".docx"):
+        return "docx"
+    return "text"
+
+
+def parse_document(file_content: bytes, kind: str) -> str:
+    """Pure parser, safe to run in a worker process."""
+    if kind == "pdf":
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(file_content))
+        return "".join(f"{page.extract_text()}\n" for page in reader.pages)
+    if kind == "docx":
+        from docx import Document
+        doc = Document(io.BytesIO(file_content))
+        return "".join(f"{para.text}\n" for para in doc.paragraphs)
+    return file_content.decode("utf-8")
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs the event loop, SDK threads or torch is unsafe
+        _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_extraction_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def extract_text_from_file(file_content: bytes, filename: str) -> str:
+    """
+    Extracts resume text off the event loop (PDF/DOCX parsing runs in a process pool).
+    Results are cached by the SHA-256 of the file bytes, so re-uploads are instant.
+    """
+    try:
+        kind = _parser_kind(filename)
+        key = f"{kind}:{hashlib.sha256(file_content).hexdigest()}"
+        cached = _text_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if kind == "text":
+            text = parse_document(file_content, kind)
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                text = await loop.run_in_executor(_get_pool(), parse_document, file_content, kind)
+            except BrokenProcessPool:
+                # A crashed worker poisons the pool; rebuild it once and retry
+                shutdown_extraction_pool()
+                text = await loop.run_in_executor(_get_pool(), parse_document, file_content, kind)
+
+        _text_cache.set(key, text)
+        return text
+    except Exception as e:
+        logger.error(f"Error parsing file: {e}")
+        return "Error reading resume."
+
+
+def extraction_cache_stats():
+    return _text_cache.stats()
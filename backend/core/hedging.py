@@ -0,0 +1,227 @@
+# backend/core/hedging.py
+import os
+import json
+import time
+import asyncio
+import bisect
+import logging
+import threading
+from collections import deque
+
+from core.llm import get_client, open_stream
+from core.timing import lazy_import
+
+logger = logging.getLogger("backend")
+
+LLM_HEDGING = os.getenv("LLM_HEDGING", "0") == "1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+# Groq model -> the same model on OpenRouter; models missing here are never hedged
+OPENROUTER_MODELS = json.loads(os.getenv("OPENROUTER_MODELS") or "{}") or {
+    "llama-3.3-70b-versatile": "meta-llama/llama-3.3-70b-instruct",
+    "llama-3.1-8b-instant": "meta-llama/llama-3.1-8b-instruct",
+}
+# The backup request fires when the primary's first token is later than this percentile of its history
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+# Deadline used until the primary has HEDGE_MIN_SAMPLES first-token timings, and the floor after that
+HEDGE_DEFAULT_DEADLINE_MS = float(os.getenv("HEDGE_DEFAULT_DEADLINE_MS", "1500"))
+HEDGE_MIN_DEADLINE_MS = float(os.getenv("HEDGE_MIN_DEADLINE_MS", "300"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+# At most this share of the last HEDGE_WINDOW requests may be hedged (caps the extra spend)
+HEDGE_MAX_RATE = float(os.getenv("HEDGE_MAX_RATE", "0.1"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+
+# The OpenAI SDK talks to OpenRouter; like the Groq client it's imported on first use
+# (main.py builds it off the event loop at startup when hedging is on)
+_openrouter = None
+_openrouter_lock = threading.Lock()
+
+
+def get_openrouter_client():
+    """Shared AsyncOpenAI client for OpenRouter, created once on first use."""
+    global _openrouter
+    if _openrouter is None:
+        with _openrouter_lock:
+            if _openrouter is None:
+                _openrouter = lazy_import("openai").AsyncOpenAI(
+                    base_url=OPENROUTER_BASE_URL,
+                    api_key=OPENROUTER_API_KEY,
+                    default_headers={"X-Title": "InterviewHelp"},
+                    max_retries=0,  # the hedge is the retry
+                )
+    return _openrouter
+
+
+class LatencyHistogram:
+    """Fixed buckets for /metrics plus a window of recent samples for percentiles."""
+    BUCKETS_MS = (100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+    def __init__(self, window=500):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=window)
+
+    def record(self, ms):
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.recent.append(ms)
+
+    def percentile(self, p):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return None
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def stats(self):
+        labels = [f"<={bucket}" for bucket in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}"]
+        return {
+            "buckets_ms": dict(zip(labels, self.counts)),
+            **{f"p{p}_ms": round(self.percentile(p) or 0.0, 1) for p in (50, 95, 99)},
+        }
+
+
+class Provider:
+    """One OpenAI-compatible endpoint and its time-to-first-token history."""
+    def __init__(self, name, get_llm_client, models=None):
+        self.name = name
+        self.get_client = get_llm_client
+        self.models = models  # our model name -> provider's; None keeps the name
+        self.ttft = LatencyHistogram()
+
+        # Metrics
+        self.requests = 0
+        self.wins = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def model_for(self, model):
+        return model if self.models is None else self.models.get(model)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "wins": self.wins,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "ttft": self.ttft.stats(),
+        }
+
+
+class Hedger:
+    """
+    Hedged streaming requests: when the primary provider (Groq) hasn't produced a
+    first token by its own p95 first-token time, the same request goes to the
+    alternate provider (OpenRouter). Whichever streams a token first is served,
+    the other one is cancelled and its HTTP stream closed.
+    Hedges are capped at HEDGE_MAX_RATE of recent requests, so a slow primary
+    can't double the bill.
+    """
+    def __init__(self, primary, alternate, enabled=LLM_HEDGING, percentile=HEDGE_PERCENTILE,
+                 max_rate=HEDGE_MAX_RATE, window=HEDGE_WINDOW):
+        self.primary = primary
+        self.alternate = alternate
+        self.enabled = enabled
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self._recent = deque(maxlen=window)  # True per hedged request
+
+        # Metrics
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.capped = 0
+
+        if self.enabled and not OPENROUTER_API_KEY:
+            logger.error("⚠️ LLM_HEDGING=1 needs OPENROUTER_API_KEY, hedging disabled")
+            self.enabled = False
+
+    def deadline(self):
+        """Seconds to wait for the primary's first token before hedging."""
+        if len(self.primary.ttft.recent) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DEADLINE_MS / 1000
+        return max(self.primary.ttft.percentile(self.percentile), HEDGE_MIN_DEADLINE_MS) / 1000
+
+    def _may_hedge(self):
+        if not self._recent:
+            return True
+        return sum(self._recent) / len(self._recent) < self.max_rate
+
+    async def _attempt(self, provider, model, messages, params):
+        provider.requests += 1
+        started = time.perf_counter()
+        try:
+            opened = await open_stream(provider.get_client(), model, messages, **params)
+        except asyncio.CancelledError:
+            provider.cancelled += 1
+            raise
+        except Exception:
+            provider.failed += 1
+            raise
+        provider.ttft.record((time.perf_counter() - started) * 1000)
+        return opened
+
+    async def open(self, model, messages, params):
+        """Like open_stream(): (completion, remaining contents, first token) from the faster provider."""
+        self.requests += 1
+        started = time.perf_counter()
+        primary = asyncio.create_task(self._attempt(self.primary, model, messages, params))
+        tasks = {primary: self.primary}
+        winner = None
+        hedged = False
+        try:
+            deadline = self.deadline()
+            done, _ = await asyncio.wait([primary], timeout=deadline)
+            alternate_model = self.alternate.model_for(model)
+            if not done and alternate_model:
+                if self._may_hedge():
+                    hedged = True
+                    self.hedged += 1
+                    logger.info(f"🪁 No first token from {self.primary.name} after {deadline * 1000:.0f}ms, "
+                                f"hedging on {self.alternate.name}")
+                    backup = self._attempt(self.alternate, alternate_model, messages, params)
+                    tasks[asyncio.create_task(backup)] = self.alternate
+                else:
+                    self.capped += 1
+
+            # First success wins; if one request fails the other one may still answer
+            pending, error = set(tasks), None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    error = task.exception()
+            if winner is None:
+                raise error
+
+            tasks[winner].wins += 1
+            if winner is not primary:
+                self.hedge_wins += 1
+            return winner.result()
+        finally:
+            self._recent.append(hedged)
+            if winner is not None and winner is not primary and not primary.done():
+                # Its first token is at least this late; leaving it out would pull the p95 deadline down
+                self.primary.ttft.record((time.perf_counter() - started) * 1000)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif task is not winner and not task.cancelled() and task.exception() is None:
+                    await task.result()[0].close()  # finished in the same tick as the winner
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "capped": self.capped,
+            "deadline_ms": round(self.deadline() * 1000, 1),
+            "providers": {provider.name: provider.stats() for provider in (self.primary, self.alternate)},
+        }
+
+
+hedger = Hedger(
+    Provider("groq", get_client),
+    Provider("openrouter", get_openrouter_client, OPENROUTER_MODELS),
+)
@@ -1,42 +1,132 @@
 import os
+import time
+import asyncio
 import logging
-from groq import Groq
+import threading
 from dotenv import load_dotenv
 
+from core.timing import lazy_import
+
 load_dotenv()
 
 # Setup Logging
 logger = logging.getLogger("backend")
 
-# Initialize Groq Client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# The async Groq client is built on first use: the SDK (httpx, pydantic models) is
+# slow to import and isn't needed to boot the API.
+# The SDK honours GROQ_BASE_URL, which lets the load test point us at a local fake server.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Shared AsyncGroq client, created once on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = lazy_import("groq").AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
 
 # The Best Model (Now powered by your credit card)
 MODEL_NAME = "llama-3.3-70b-versatile"
 
-async def stream_completion(messages):
+# Shared limits for the request/response LLM calls (coach + optimizer)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "45"))
+
+
+class LLMExecutor:
     """
-    Streams response from Groq.
+    One shared gate for non-streaming chat completions.
+    Caps how many calls hit the provider at once, counts who is waiting for a slot
+    and enforces a per-call timeout so a stuck request can't hold a slot forever.
     """
+    def __init__(self, get_llm_client, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_CALL_TIMEOUT):
+        self.get_client = get_llm_client
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+        # Metrics
+        self.queued = 0
+        self.peak_queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.total_latency = 0.0
+
+    async def create(self, timeout=None, **kwargs):
+        """Drop-in async replacement for client.chat.completions.create(**kwargs)."""
+        queued_at = time.perf_counter()
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self.total_wait += started - queued_at
+        self.in_flight += 1
+        try:
+            response = await asyncio.wait_for(
+                self.get_client().chat.completions.create(**kwargs),
+                timeout=timeout or self.timeout,
+            )
+            self.completed += 1
+            return response
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.error(f"⏱️ LLM call timed out after {timeout or self.timeout}s ({kwargs.get('model')})")
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.total_latency += time.perf_counter() - started
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self):
+        finished = self.completed + self.failed + self.timed_out
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queued,
+            "peak_queue_depth": self.peak_queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 1) if finished else 0.0,
+            "avg_latency_ms": round(self.total_latency / finished * 1000, 1) if finished else 0.0,
+        }
+
+
+llm_executor = LLMExecutor(get_client)
+
+async def _contents(completion):
+    async for chunk in completion:
+        if not chunk.choices:
+            continue
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+async def open_stream(llm_client, model, messages, **params):
+    """
+    Starts a streamed chat completion on any OpenAI-compatible async client and
+    waits for its first token. Returns (completion, remaining contents, first token or None).
+    """
+    completion = await llm_client.chat.completions.create(model=model, messages=messages, stream=True, **params)
     try:
-        completion = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=messages,
-            temperature=0.6,
-            max_tokens=1024,
-            top_p=1,
-            stream=True,
-            stop=None,
-        )
-
-        for chunk in completion:
-            content = chunk.choices[0].delta.content
-            if content:
-                yield content
-
-    except Exception as e:
-        # Log the error so you can see it in your terminal
-        logger.error(f"❌ Groq Error: {str(e)}")
-        
-        # Send a user-friendly message to the frontend
-        yield f" [AI Connection Error: {str(e)}]"
\ No newline at end of file
+        contents = _contents(completion)
+        first = await anext(contents, None)
+    except BaseException:
+        await completion.close()
+        raise
+    return completion, contents, first
+
@@ -0,0 +1,211 @@
+# backend/core/local_stt.py
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+import transcriber
+from transcriber import SAMPLE_RATE, stream_segments
+from core.whisper_pool import whisper_scheduler, WHISPER_POOL_WORKERS
+from core.vad_service import batched_vad, VAD_BATCHING
+from core.timing import lazy_import
+
+logger = logging.getLogger("backend")
+
+VAD_FRAME = 512  # samples per Silero VAD step at 16 kHz
+# Bytes the demuxer may buffer before it must start decoding (MediaRecorder sends ~250 ms chunks)
+AUDIO_PROBE_BYTES = os.getenv("LOCAL_STT_PROBE_BYTES", "32768")
+
+
+class _AudioPipe:
+    """Blocking file-like object PyAV reads from while the socket keeps writing to it."""
+    def __init__(self):
+        self._data = bytearray()
+        self._ready = threading.Condition()
+        self._closed = False
+        self.received = 0
+
+    def write(self, chunk: bytes):
+        with self._ready:
+            self._data += chunk
+            self.received += len(chunk)
+            self._ready.notify()
+
+    def close(self):
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._ready:
+            while not self._data and not self._closed:
+                self._ready.wait()
+            size = len(self._data) if size < 0 else min(size, len(self._data))
+            chunk = bytes(self._data[:size])
+            del self._data[:size]
+            return chunk
+
+
+def warm_up():
+    """Loads the VAD and Whisper models before the first local session (blocking; run it in a thread)."""
+    started = time.perf_counter()
+    try:
+        from smart_audio import get_vad_model
+        get_vad_model()
+        if WHISPER_POOL_WORKERS > 0:
+            whisper_scheduler.warm_up()
+        else:
+            transcriber.get_model()
+    except Exception as e:
+        logger.error(f"⚠️ Local model warm-up failed (models load on first use instead): {e}")
+        return
+    logger.info(f"🔥 Local STT models warm in {time.perf_counter() - started:.1f}s")
+
+
+def model_load_stats():
+    """Load time and source of each local model; doesn't import torch just to report."""
+    smart_audio = sys.modules.get("smart_audio")
+    return {
+        "vad": smart_audio.load_info if smart_audio else {"loaded": False},
+        "whisper": transcriber.load_info,
+        "whisper_workers": whisper_scheduler.worker_loads,
+    }
+
+
+def _result(text: str, is_final: bool):
+    # Same attribute path the Deepgram handlers read: result.channel.alternatives[0].transcript
+    return SimpleNamespace(is_final=is_final, channel=SimpleNamespace(alternatives=[SimpleNamespace(transcript=text)]))
+
+
+class LocalLiveTranscriber:
+    """
+    Local alternative to a Deepgram live connection for /ws (STT_BACKEND=local).
+    Exposes the same on()/send()/finish() surface and events, so the socket code
+    doesn't care which backend it talks to.
+
+    The MediaRecorder stream (webm/opus or mp4) is decoded in memory with PyAV
+    into 16 kHz float32, cut into utterances by the Silero VAD buffer (scored
+    in the shared batched VAD pass, core/vad_service.py) and
+    transcribed by the shared Whisper batch scheduler (core/whisper_pool.py).
+    With WHISPER_POOL_WORKERS=0 the model runs in this session's thread instead
+    and each decoded segment is emitted as an interim transcript right away.
+    Every utterance ends with a final transcript followed by UtteranceEnd.
+    """
+    def __init__(self):
+        from smart_audio import SmartAudioBuffer  # torch + Silero only when local STT is used
+
+        # Same event enum as the Deepgram SDK, so /ws registers handlers identically
+        self.events = lazy_import("deepgram").LiveTranscriptionEvents
+        self._handlers = {event: [] for event in self.events}
+        self._pipe = _AudioPipe()
+        self._vad = SmartAudioBuffer(SAMPLE_RATE)
+        self._utterances = queue.Queue()
+        # The VAD returns views into its ring; the queue may hold them past their lifetime
+        self._vad_stream = batched_vad.open_stream(self._vad, self._queue_utterance) if VAD_BATCHING else None
+
+        # Metrics
+        self.utterances = 0
+        self.audio_seconds = 0.0
+        self.transcribe_seconds = 0.0
+
+        self._decoder = threading.Thread(target=self._decode_loop, name="local-stt-decode", daemon=True)
+        self._worker = threading.Thread(target=self._transcribe_loop, name="local-stt-whisper", daemon=True)
+        self._decoder.start()
+        self._worker.start()
+
+    # --- DEEPGRAM-COMPATIBLE SURFACE ---
+    def on(self, event, handler):
+        if event in self.events and callable(handler):
+            self._handlers[event].append(handler)
+
+    def _emit(self, event, **kwargs):
+        for handler in self._handlers[event]:
+            try:
+                handler(self, **kwargs)
+            except Exception as e:
+                logger.error(f"Local STT handler error: {e}")
+
+    def send(self, data) -> int:
+        if isinstance(data, (bytes, bytearray)):
+            self._pipe.write(data)
+            return len(data)
+        return 0  # KeepAlive and other control text mean nothing locally
+
+    def finish(self):
+        self._pipe.close()
+        self._decoder.join(timeout=5)
+        self._utterances.put(None)
+        self._worker.join(timeout=30)
+        if self.audio_seconds:
+            logger.info(f"🗣️ Local STT: {self.utterances} utterances, {self.audio_seconds:.1f}s audio, "
+                        f"RTF {self.transcribe_seconds / self.audio_seconds:.2f}")
+
+    # --- DECODE + ENDPOINTING ---
+    def _decode_loop(self):
+        import av
+
+        pending = np.zeros(0, dtype=np.float32)
+        try:
+            container = av.open(self._pipe, "r", options={"probesize": AUDIO_PROBE_BYTES, "analyzeduration": "0"})
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+            for packet_frame in container.decode(audio=0):
+                for pcm in resampler.resample(packet_frame):
+                    pending = np.concatenate((pending, pcm.to_ndarray().reshape(-1)))
+                    usable = len(pending) - len(pending) % VAD_FRAME
+                    for start in range(0, usable, VAD_FRAME):
+                        frame = pending[start:start + VAD_FRAME]
+                        if self._vad_stream is not None:
+                            self._vad_stream.push(frame)
+                        else:
+                            utterance = self._vad.process_frame(frame)
+                            if utterance is not None:
+                                self._queue_utterance(utterance)
+                    pending = pending[usable:]
+        except Exception as e:
+            if self._pipe.received:  # no audio at all is just a session that never spoke
+                logger.error(f"Local STT decode failed: {e}")
+                self._emit(self.events.Error, error={"type": "Exception", "message": str(e)})
+
+        # Stream ended mid-sentence: still transcribe what was said
+        if self._vad_stream is not None:
+            # The buffer belongs to the VAD thread, which flushes it after the last frame
+            if not self._vad_stream.finish():
+                logger.warning("⚠️ Batched VAD didn't finish the stream in time; its tail is dropped")
+            return
+        tail = self._vad.flush()
+        if tail is not None:
+            self._queue_utterance(tail)
+
+    def _queue_utterance(self, utterance):
+        self._utterances.put(utterance.copy())
+
+    # --- TRANSCRIPTION ---
+    def _transcribe_loop(self):
+        while True:
+            audio = self._utterances.get()
+            if audio is None:
+                return
+            started = time.perf_counter()
+            parts = []
+            try:
+                if WHISPER_POOL_WORKERS > 0:
+                    text = whisper_scheduler.transcribe(audio)
+                    parts = [text] if text else []
+                else:
+                    for text in stream_segments(audio, SAMPLE_RATE):
+                        parts.append(text)
+                        self._emit(self.events.Transcript, result=_result(" ".join(parts), False))
+            except Exception as e:
+                logger.error(f"Local STT transcription failed: {e}")
+            self.utterances += 1
+            self.audio_seconds += len(audio) / SAMPLE_RATE
+            self.transcribe_seconds += time.perf_counter() - started
+
+            if parts:
+                self._emit(self.events.Transcript, result=_result(" ".join(parts), True))
+                self._emit(self.events.UtteranceEnd, utterance_end=SimpleNamespace(type="UtteranceEnd"))
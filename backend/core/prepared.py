@@ -0,0 +1,291 @@
+# backend/core/prepared.py
+import os
+import json
+import time
+import asyncio
+import logging
+from difflib import SequenceMatcher
+
+from core.router import model_router
+from core.speculative import normalize
+
+logger = logging.getLogger("backend")
+
+PREPARED_ANSWERS = os.getenv("PREPARED_ANSWERS", "1") == "1"
+# JSON file {"canonical question": ["other phrasing", ...]} replacing the built-in list
+PREPARED_QUESTIONS_PATH = os.getenv("PREPARED_QUESTIONS_PATH")
+# Word-level similarity between the transcript's tail and a known phrasing
+PREPARED_MATCH_RATIO = float(os.getenv("PREPARED_MATCH_RATIO", "0.85"))
+# Longer utterances carry their own detail and are always answered live
+PREPARED_MAX_WORDS = int(os.getenv("PREPARED_MAX_WORDS", "20"))
+# Warm-up calls in flight per uploaded context, so uploads don't crowd out live answers
+PREPARED_CONCURRENCY = int(os.getenv("PREPARED_CONCURRENCY", "2"))
+
+DEFAULT_QUESTIONS = {
+    "Tell me about yourself.": [
+        "tell me about yourself", "tell me a little about yourself", "tell me a bit about yourself",
+        "walk me through your resume", "walk me through your background", "introduce yourself",
+    ],
+    "Why do you want to work here?": [
+        "why do you want to work here", "why do you want to work for us", "why do you want this job",
+        "why are you interested in this role", "why are you interested in this position",
+        "what interests you about this role",
+    ],
+    "What do you know about our company?": [
+        "what do you know about us", "what do you know about our company", "what do you know about the company",
+    ],
+    "Why should we hire you?": [
+        "why should we hire you", "why are you a good fit for this role", "what makes you a good fit",
+    ],
+    "What is your greatest strength?": [
+        "what is your greatest strength", "what is your biggest strength", "what are your strengths",
+    ],
+    "What is your biggest weakness?": [
+        "what is your biggest weakness", "what is your greatest weakness", "what are your weaknesses",
+    ],
+    "Where do you see yourself in five years?": [
+        "where do you see yourself in five years", "where do you see yourself in 5 years",
+        "what are your long term career goals",
+    ],
+    "Why are you leaving your current job?": [
+        "why are you leaving your current job", "why are you looking for a new role",
+        "why do you want to leave your current company",
+    ],
+    "Tell me about a challenge you faced at work and how you handled it.": [
+        "tell me about a challenge you faced", "tell me about a difficult situation at work",
+        "describe a challenge you overcame",
+    ],
+}
+
+_CONTRACTIONS = {"what's": "what is", "where's": "where is", "you're": "you are", "i'm": "i am"}
+
+
+def load_questions(path=PREPARED_QUESTIONS_PATH) -> dict:
+    if not path:
+        return DEFAULT_QUESTIONS
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"⚠️ Could not read PREPARED_QUESTIONS_PATH {path}, using the built-in questions: {e}")
+        return DEFAULT_QUESTIONS
+
+
+def _words(text: str):
+    return [_CONTRACTIONS.get(word, word) for word in normalize(text).split()]
+
+
+class QuestionMatcher:
+    """
+    Maps a transcript to one of the prepared questions.
+    Each known phrasing is compared with the last N (+/-1) words of the transcript,
+    so a short lead-in ("okay, so can you ...") or a trailing "please" still
+    matches. Matchers are pre-built per phrasing and cheap bounds run first,
+    which keeps a lookup well under a millisecond.
+    """
+    def __init__(self, questions, ratio=PREPARED_MATCH_RATIO, max_words=PREPARED_MAX_WORDS):
+        self.ratio = ratio
+        self.max_words = max_words
+        self._exact = {}
+        self._phrasings = []  # (word count, SequenceMatcher with the phrasing as seq2, canonical)
+        for canonical, phrasings in questions.items():
+            for phrasing in [canonical, *phrasings]:
+                words = _words(phrasing)
+                self._exact[" ".join(words)] = canonical
+                self._phrasings.append((len(words), SequenceMatcher(None, b=words, autojunk=False), canonical))
+
+    def match(self, text: str):
+        """Canonical question for this transcript, or None."""
+        words = _words(text)
+        if not words or len(words) > self.max_words:
+            return None
+        exact = self._exact.get(" ".join(words))
+        if exact is not None:
+            return exact
+
+        best, best_ratio = None, self.ratio
+        for length, matcher, canonical in self._phrasings:
+            for n in (length - 1, length, length + 1):
+                if n <= 0 or n > len(words):
+                    continue
+                matcher.set_seq1(words[-n:])
+                if matcher.real_quick_ratio() >= best_ratio and matcher.quick_ratio() >= best_ratio:
+                    ratio = matcher.ratio()
+                    if ratio >= best_ratio:
+                        best, best_ratio = canonical, ratio
+        return best
+
+
+class _WarmUp:
+    """Answers being generated for one user's context."""
+    def __init__(self, context_key):
+        self.context_key = context_key
+        self.tasks = {}  # question -> Task resolving to the answer
+        self.waiter = None
+
+
+class AnswerWarmer:
+    """
+    Pre-generates answers to common interview questions as soon as a context is
+    uploaded, so they are ready (or already in flight) when the interviewer asks.
+    Answers land on Brain.prepared and are shared like the rest of the session.
+    A new upload for the same user cancels the previous warm-up.
+    """
+    def __init__(self, questions=None, concurrency=PREPARED_CONCURRENCY, enabled=PREPARED_ANSWERS):
+        self.questions = questions if questions is not None else load_questions()
+        self.matcher = QuestionMatcher(self.questions)
+        self.concurrency = concurrency
+        self.enabled = enabled
+        self._jobs = {}  # user_id -> _WarmUp
+
+        # Metrics
+        self.started = 0
+        self.generated = 0
+        self.failed = 0
+        self.total_generate = 0.0
+        self.hits = 0
+        self.not_ready = 0
+
+    def start(self, user_id, brain, on_ready=None):
+        """Warm up answers for the brain's current context. Must be called on the event loop."""
+        if not self.enabled or not (brain.resume or brain.job_description):
+            return
+        self.cancel(user_id)
+        missing = [question for question in self.questions if question not in brain.prepared]
+        if not missing:
+            return
+
+        job = _WarmUp(brain.context_key)
+        slots = asyncio.Semaphore(self.concurrency)
+        for question in missing:
+            job.tasks[question] = asyncio.create_task(self._generate(brain, job, question, slots))
+        job.waiter = asyncio.create_task(self._wait(user_id, brain, job, on_ready))
+        self._jobs[user_id] = job
+        self.started += 1
+
+    async def _generate(self, brain, job, question, slots):
+        async with slots:
+            started = time.perf_counter()
+            try:
+                response = await model_router.create(
+                    "prepared",
+                    brain.build_standalone_messages(question),
+                    temperature=0.6,
+                    max_tokens=1024,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            answer = response.choices[0].message.content
+            self.generated += 1
+            self.total_generate += time.perf_counter() - started
+            if brain.context_key == job.context_key:
+                brain.prepared[question] = answer
+            return answer
+
+    async def _wait(self, user_id, brain, job, on_ready):
+        started = time.perf_counter()
+        results = await asyncio.gather(*job.tasks.values(), return_exceptions=True)
+        if self._jobs.get(user_id) is not job:
+            return  # cancelled by a newer upload
+        del self._jobs[user_id]
+        if brain.context_key != job.context_key:
+            return
+        ready = sum(isinstance(result, str) for result in results)
+        logger.info(f"🧊 Prepared {ready}/{len(results)} answers for {user_id} in {time.perf_counter() - started:.1f}s")
+        if on_ready is not None:
+            on_ready()
+
+    def lookup(self, user_id, brain, question):
+        """
+        The prepared answer, or None. An answer still generating (or queued behind
+        PREPARED_CONCURRENCY) is not waited for: a non-streamed completion would
+        reach the user later than a fresh streamed one.
+        """
+        answer = brain.prepared.get(question)
+        if answer:
+            return answer
+        job = self._jobs.get(user_id)
+        if job is None or job.context_key != brain.context_key:
+            return None
+        task = job.tasks.get(question)
+        if task is None or not task.done() or task.cancelled() or task.exception():
+            return None
+        return task.result()
+
+    def in_progress(self, user_id, question):
+        job = self._jobs.get(user_id)
+        return job is not None and question in job.tasks and not job.tasks[question].done()
+
+    def cancel(self, user_id):
+        job = self._jobs.pop(user_id, None)
+        if job is not None:
+            for task in job.tasks.values():
+                task.cancel()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "questions": len(self.questions),
+            "warming_users": len(self._jobs),
+            "started": self.started,
+            "generated": self.generated,
+            "failed": self.failed,
+            "avg_generate_ms": round(self.total_generate / self.generated * 1000, 1) if self.generated else 0.0,
+            "hits": self.hits,
+            "not_ready": self.not_ready,
+        }
+
+
+class PreparedResponder:
+    """
+    Serves prepared answers in one live session and tracks its hit rate.
+    Only finished answers are served, at once; anything else (including a
+    warm-up still generating) falls through to the streamed live path.
+    """
+    def __init__(self, user_id, brain, warmer=None):
+        self.user_id = user_id
+        self.brain = brain
+        self.warmer = warmer or answer_warmer
+
+        # Metrics
+        self.questions = 0
+        self.matched = 0
+        self.hits = 0
+        self.not_ready = 0
+
+    def take(self, text: str):
+        """Async iterator of the prepared answer if `text` is a known question, else None."""
+        self.questions += 1
+        if not self.warmer.enabled:
+            return None
+        question = self.warmer.matcher.match(text)
+        if question is None:
+            return None
+        self.matched += 1
+        answer = self.warmer.lookup(self.user_id, self.brain, question)
+        if answer is None:
+            if self.warmer.in_progress(self.user_id, question):
+                self.not_ready += 1
+                self.warmer.not_ready += 1
+            return None
+        self.hits += 1
+        self.warmer.hits += 1
+        return self._replay(answer)
+
+    async def _replay(self, answer):
+        yield answer
+
+    def stats(self):
+        return {
+            "questions": self.questions,
+            "matched": self.matched,
+            "hits": self.hits,
+            "not_ready": self.not_ready,
+            "hit_rate": round(self.hits / self.questions, 3) if self.questions else 0.0,
+        }
+
+
+answer_warmer = AnswerWarmer()
@@ -0,0 +1,100 @@
+# backend/core/responses.py
+import os
+import time
+import asyncio
+import logging
+import weakref
+
+logger = logging.getLogger("backend")
+
+# A new utterance this soon after the previous one is treated as its continuation
+RESPONSE_MERGE_WINDOW_MS = int(os.getenv("RESPONSE_MERGE_WINDOW_MS", "1500"))
+# Concurrent LLM generations one user may run across all of their sockets
+MAX_GENERATIONS_PER_USER = int(os.getenv("MAX_GENERATIONS_PER_USER", "1"))
+
+# user_id -> Semaphore, kept alive only while a session of that user holds it
+_user_slots = weakref.WeakValueDictionary()
+
+
+def _slots_for(user_id: str) -> asyncio.Semaphore:
+    slots = _user_slots.get(user_id)
+    if slots is None:
+        slots = asyncio.Semaphore(MAX_GENERATIONS_PER_USER)
+        _user_slots[user_id] = slots
+    return slots
+
+
+class ResponseManager:
+    """
+    Owns the AI generation of one live session.
+    Only one answer streams at a time: a new question cancels the one in flight
+    (superseded), and a follow-up arriving within the merge window is folded into
+    the in-flight request instead of starting a second stream.
+    `respond(text)` is the coroutine that streams one answer to the socket.
+    """
+    def __init__(self, user_id, respond, merge_window_ms=RESPONSE_MERGE_WINDOW_MS):
+        self.user_id = user_id
+        self.respond = respond
+        self.merge_window = merge_window_ms / 1000
+        self._slots = _slots_for(user_id)
+        self._active = None
+        self._active_text = ""
+        self._active_started = 0.0
+
+        # Metrics
+        self.submitted = 0
+        self.merged = 0
+        self.superseded = 0
+        self.completed = 0
+
+    @property
+    def slots(self):
+        """Per-user generation semaphore, shared with the session's speculative answers."""
+        return self._slots
+
+    @property
+    def busy(self):
+        return self._active is not None and not self._active.done()
+
+    def submit(self, text: str, respond=None):
+        """
+        Queue an interviewer utterance for answering. Must be called on the event loop.
+        `respond` overrides the session's answer coroutine for this one utterance.
+        """
+        self.submitted += 1
+        now = time.monotonic()
+        if self.busy:
+            if now - self._active_started < self.merge_window:
+                text = f"{self._active_text} {text}"
+                self.merged += 1
+                logger.info(f"🔗 Merging follow-up into current request for {self.user_id}")
+            else:
+                self.superseded += 1
+                logger.info(f"⏭️ New question supersedes current answer for {self.user_id}")
+            self._active.cancel()
+
+        self._active_text = text
+        self._active_started = now
+        self._active = asyncio.create_task(self._run(text, respond or self.respond))
+        self._active.add_done_callback(self._log_failure)
+
+    def _log_failure(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"⚠️ Answer failed for {self.user_id}: {task.exception()}")
+
+    async def _run(self, text, respond):
+        async with self._slots:
+            await respond(text)
+        self.completed += 1
+
+    def cancel(self):
+        if self._active is not None and not self._active.done():
+            self._active.cancel()
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "merged": self.merged,
+            "superseded": self.superseded,
+            "completed": self.completed,
+        }
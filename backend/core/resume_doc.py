@@ -0,0 +1,144 @@
+# backend/core/resume_doc.py
+import io
+import re
+import logging
+
+from docx import Document
+from docx.shared import Pt, Inches, RGBColor
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+logger = logging.getLogger("backend")
+
+ACCENT = RGBColor(31, 73, 125)
+
+# Split the text by the markdown bold syntax ** (compiled once, not per bullet)
+_BOLD_MARKDOWN = re.compile(r'(\*\*.*?\*\*)')
+
+# Serialized, pre-styled base document (margins + heading colour already applied)
+_template_bytes = None
+# Style name -> style id, resolved once. python-docx resolves names by scanning
+# every style in styles.xml on each assignment, which dominated render time.
+_style_ids = {}
+
+
+def load_resume_template() -> bytes:
+    """Builds the styled template once; call at startup to keep it off the first request."""
+    global _template_bytes
+    if _template_bytes is None:
+        doc = Document()
+        for section in doc.sections:
+            section.top_margin, section.bottom_margin = Inches(1), Inches(1)
+            section.left_margin, section.right_margin = Inches(1), Inches(1)
+        doc.styles['Heading 1'].font.color.rgb = ACCENT
+        for style_name in ('Heading 1', 'List Bullet'):
+            _style_ids[style_name] = doc.styles[style_name].style_id
+
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        _template_bytes = buffer.getvalue()
+        logger.info(f"📄 Resume template ready ({len(_template_bytes)} bytes)")
+    return _template_bytes
+
+
+def _apply_style(p, style):
+    style_id = _style_ids.get(style)
+    if style_id:
+        p._p.style = style_id
+    else:
+        p.style = style
+
+
+def add_heading(doc, text: str):
+    p = doc.add_paragraph()
+    _apply_style(p, 'Heading 1')
+    p.add_run(text)
+    return p
+
+
+def add_markdown_paragraph(doc_element, text: str, style=None):
+    """
+    Helper function to parse **bold** markdown and add it to a python-docx paragraph.
+    """
+    p = doc_element.add_paragraph()
+    if style:
+        _apply_style(p, style)
+    if '**' not in text:
+        # Fast path: most skills / bullets have no bolding at all
+        p.add_run(text)
+        return p
+
+    for part in _BOLD_MARKDOWN.split(text):
+        if not part:
+            continue
+        if part.startswith('**') and part.endswith('**'):
+            # It's bold! Remove the asterisks and add as bold run
+            p.add_run(part[2:-2]).bold = True
+        else:
+            # Normal text
+            p.add_run(part)
+    return p
+
+
+def create_optimized_word_doc(ai_data: dict, original_text: str) -> io.BytesIO:
+    doc = Document(io.BytesIO(load_resume_template()))
+
+    # 1. Contact Info
+    name = ai_data.get("contact_info", {}).get("name", "Name Not Found")
+    contact_str = ai_data.get("contact_info", {}).get("contact_string", "Contact Info Not Found")
+
+    header_p = doc.add_paragraph()
+    header_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    name_run = header_p.add_run(name)
+    name_run.bold = True
+    name_run.font.size = Pt(24)
+    name_run.font.color.rgb = ACCENT
+
+    contact = doc.add_paragraph(contact_str)
+    contact.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    line = doc.add_paragraph()
+    line.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    line.add_run("_" * 50).font.color.rgb = RGBColor(180, 180, 180)
+
+    # 2. Summary
+    if ai_data.get("summary"):
+        add_heading(doc, 'PROFESSIONAL PROFILE')
+        add_markdown_paragraph(doc, ai_data["summary"])
+
+    # 3. Skills
+    if ai_data.get("skills"):
+        add_heading(doc, 'CORE COMPETENCIES & SKILLS')
+        for skill in ai_data["skills"]:
+            add_markdown_paragraph(doc, skill, style='List Bullet')
+
+    # 4. Experience (The AI will no longer drop jobs here!)
+    if ai_data.get("experience"):
+        add_heading(doc, 'PROFESSIONAL EXPERIENCE')
+        for job in ai_data["experience"]:
+            p = doc.add_paragraph()
+            if job.get("title"): p.add_run(f"{job['title']}").bold = True
+            if job.get("company"): p.add_run(f" | {job['company']}")
+            if job.get("dates"): p.add_run(f" | {job['dates']}")
+
+            for bullet in job.get("bullets", []):
+                add_markdown_paragraph(doc, bullet, style='List Bullet')
+
+    # 5. Education & Certifications
+    if ai_data.get("certifications"):
+        add_heading(doc, 'CERTIFICATIONS & REQUIREMENTS')
+        for cert in ai_data["certifications"]:
+            add_markdown_paragraph(doc, cert, style='List Bullet')
+
+    # 6. Tier 3 Gap Bridger
+    if ai_data.get("gap_bridger_project") and ai_data.get("gap_bridger_bullets"):
+        add_heading(doc, 'TECHNICAL PROJECTS & UPSKILLING')
+        p = doc.add_paragraph()
+        p.add_run(f"{ai_data['gap_bridger_project']}").bold = True
+        for bullet in ai_data["gap_bridger_bullets"]:
+            add_markdown_paragraph(doc, bullet, style='List Bullet')
+
+    doc_io = io.BytesIO()
+    doc.save(doc_io)
+    doc_io.seek(0)
+
+    return doc_io
@@ -0,0 +1,193 @@
+# backend/core/retrieval.py
+import os
+import re
+import hashlib
+import logging
+
+import numpy as np
+
+from core.cache import LRUCache
+
+logger = logging.getLogger("backend")
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", "600"))
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_HEADING = re.compile(r"^[A-Z0-9 &/,\-]{4,}:?$|^.{1,40}:$")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+_STOPWORDS = frozenset("""
+a an and are as at be but by can could did do does for from had has have how i if in into is it its
+me my of on or our so that the their them then there these they this to was we were what when where
+which who why will with would you your about tell us
+""".split())
+
+
+def tokenize(text: str):
+    return [tok for tok in _TOKEN.findall(text.lower()) if tok not in _STOPWORDS]
+
+
+def split_sections(text: str, max_chars: int = CHUNK_CHARS):
+    """
+    Split resume / job text into chunks that follow its own structure:
+    a new chunk starts at blank lines and headings, long blocks are packed line by line.
+    """
+    blocks, current = [], []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or _HEADING.match(stripped):
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            if stripped:
+                current.append(stripped)
+            continue
+        current.append(stripped)
+    if current:
+        blocks.append("\n".join(current))
+
+    chunks = []
+    for block in blocks:
+        if len(block) <= max_chars:
+            chunks.append(block)
+            continue
+        piece = ""
+        for line in _split_long_lines(block.split("\n"), max_chars):
+            if piece and len(piece) + len(line) + 1 > max_chars:
+                chunks.append(piece)
+                piece = ""
+            piece = f"{piece}\n{line}" if piece else line
+        if piece:
+            chunks.append(piece)
+    return chunks
+
+
+def _split_long_lines(lines, max_chars):
+    """Break lines over max_chars (e.g. a JD pasted as one paragraph) at sentence ends, then hard-wrap."""
+    for line in lines:
+        if len(line) <= max_chars:
+            yield line
+            continue
+        piece = ""
+        for sentence in _SENTENCE_END.split(line):
+            while len(sentence) > max_chars:
+                if piece:
+                    yield piece
+                    piece = ""
+                yield sentence[:max_chars]
+                sentence = sentence[max_chars:]
+            if piece and len(piece) + len(sentence) + 1 > max_chars:
+                yield piece
+                piece = ""
+            piece = f"{piece} {sentence}" if piece else sentence
+        if piece:
+            yield piece
+
+
+class ResumeIndex:
+    """
+    BM25 index over the resume and job description chunks of one user.
+    Postings are stored as flat NumPy arrays (chunk id, per-posting BM25 weight),
+    so scoring a question is one isin + bincount, regardless of resume length.
+    """
+    def __init__(self, resume_text: str, job_text: str = "", k1: float = 1.5, b: float = 0.75):
+        self.chunks = []  # (source, text)
+        for source, text in (("resume", resume_text or ""), ("job", job_text or "")):
+            self.chunks.extend((source, chunk) for chunk in split_sections(text))
+
+        vocab = {}
+        chunk_ids, term_ids, tfs, lengths = [], [], [], []
+        for chunk_id, (_, text) in enumerate(self.chunks):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            counts = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for tok, tf in counts.items():
+                chunk_ids.append(chunk_id)
+                term_ids.append(vocab.setdefault(tok, len(vocab)))
+                tfs.append(tf)
+
+        self.vocab = vocab
+        self.sources = np.array([source for source, _ in self.chunks])
+        self._chunk_ids = np.array(chunk_ids, dtype=np.int32)
+        self._term_ids = np.array(term_ids, dtype=np.int32)
+
+        n = max(len(self.chunks), 1)
+        tf = np.array(tfs, dtype=np.float32)
+        doc_len = np.array(lengths, dtype=np.float32)
+        avg_len = float(doc_len.mean()) if len(doc_len) else 1.0
+        df = np.bincount(self._term_ids, minlength=len(vocab)).astype(np.float32)
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        norm = k1 * (1.0 - b + b * doc_len[self._chunk_ids] / max(avg_len, 1.0)) if len(tf) else tf
+        self._weights = (idf[self._term_ids] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    def scores(self, query: str) -> np.ndarray:
+        query_ids = [self.vocab[tok] for tok in set(tokenize(query)) if tok in self.vocab]
+        if not query_ids:
+            return np.zeros(len(self.chunks), dtype=np.float32)
+        mask = np.isin(self._term_ids, query_ids)
+        return np.bincount(self._chunk_ids[mask], weights=self._weights[mask], minlength=len(self.chunks))
+
+    def top_k(self, query: str, k: int = RETRIEVAL_TOP_K, source: str = "resume"):
+        """Best k chunks of one source, returned in their original document order."""
+        return self.select(query, max_chars=None, source=source, k=k)
+
+    def select(self, query: str, max_chars=None, source: str = "resume", k=None) -> str:
+        """
+        Greedily keep the highest scoring chunks until `max_chars` (or `k` chunks) is reached.
+        Chunks are re-emitted in document order so the text still reads like the original.
+        """
+        candidates = np.flatnonzero(self.sources == source)
+        if not len(candidates):
+            return ""
+        scores = self.scores(query)[candidates]
+        # Stable sort keeps earlier chunks first on ties (headers, summary)
+        ranked = candidates[np.argsort(-scores, kind="stable")]
+
+        picked, used = [], 0
+        for chunk_id in ranked:
+            text = self.chunks[chunk_id][1]
+            if max_chars is not None and used + len(text) > max_chars:
+                continue
+            picked.append(chunk_id)
+            used += len(text) + 1
+            if k is not None and len(picked) >= k:
+                break
+        if not picked:
+            # Even the best chunk is over budget: its head beats returning nothing
+            return self.chunks[ranked[0]][1][:max_chars]
+        return "\n".join(self.chunks[i][1] for i in sorted(picked))
+
+    def nbytes(self):
+        return (
+            self._chunk_ids.nbytes + self._term_ids.nbytes + self._weights.nbytes
+            + sum(len(text) for _, text in self.chunks)
+        )
+
+
+# One index per distinct resume/job pair, shared by the coach and optimizer endpoints
+_index_cache = LRUCache(max_entries=256, max_bytes=32 * 1024 * 1024, ttl=60 * 60, sizeof=lambda idx: idx.nbytes())
+
+
+def get_resume_index(resume_text: str, job_text: str = "") -> ResumeIndex:
+    key = hashlib.sha256(f"{resume_text}\x00{job_text}".encode()).hexdigest()
+    index = _index_cache.get(key)
+    if index is None:
+        index = ResumeIndex(resume_text, job_text)
+        _index_cache.set(key, index)
+    return index
+
+
+def relevant_text(text: str, query: str, max_chars: int) -> str:
+    """
+    Drop-in replacement for text[:max_chars]: short texts come back untouched,
+    long ones keep the sections that matter for `query` instead of just the head.
+    """
+    if len(text) <= max_chars:
+        return text
+    return get_resume_index(text).select(query, max_chars=max_chars)
+
+
+def index_stats():
+    return _index_cache.stats()
@@ -0,0 +1,215 @@
+# backend/core/router.py
+import os
+import re
+import time
+import asyncio
+import logging
+from collections import deque, defaultdict
+
+from core.llm import get_client, llm_executor, open_stream, MODEL_NAME
+from core.hedging import hedger
+from core.tokens import count_tokens, count_message_tokens
+
+logger = logging.getLogger("backend")
+
+LLM_ROUTING = os.getenv("LLM_ROUTING", "1") == "1"
+LLM_MODEL_LARGE = os.getenv("LLM_MODEL_LARGE", MODEL_NAME)
+LLM_MODEL_SMALL = os.getenv("LLM_MODEL_SMALL", "llama-3.1-8b-instant")
+# Live questions up to this many words (and with no complexity cue) go to the small model
+ROUTER_SMALL_MAX_WORDS = int(os.getenv("ROUTER_SMALL_MAX_WORDS", "12"))
+# Bigger prompts go to the large model (small models lose track of long resumes)
+ROUTER_SMALL_MAX_PROMPT_TOKENS = int(os.getenv("ROUTER_SMALL_MAX_PROMPT_TOKENS", "3000"))
+# Optimizer tier / coach difficulty level from which the large model is used
+ROUTER_LARGE_MIN_TIER = int(os.getenv("ROUTER_LARGE_MIN_TIER", "2"))
+# A live stream with no first token by then is abandoned for the fallback model
+ROUTER_FIRST_TOKEN_TIMEOUT = float(os.getenv("ROUTER_FIRST_TOKEN_TIMEOUT", "6"))
+
+# Tasks that always want the large model (quality matters more than latency there)
+LARGE_TASKS = frozenset({"extract", "optimize", "coach_end", "prepared"})
+
+_COMPLEX = re.compile(
+    r"\b(tell me about a time|describe a (time|situation)|walk me through|design|architect|trade ?offs?|compare|"
+    r"difference between|how would you|what would you do|why did you|explain how|scale|challenge|conflict|"
+    r"lead|led|failure|failed|strategy|approach|prioritize)\b",
+    re.I,
+)
+
+DIFFICULTY_TIERS = {"Easy": 1, "Medium": 2, "Hard": 3}
+
+
+def is_complex(question: str) -> bool:
+    return len(question.split()) > ROUTER_SMALL_MAX_WORDS or bool(_COMPLEX.search(question))
+
+
+class ModelStats:
+    """Latency and token counters for one model."""
+    def __init__(self):
+        self.calls = 0
+        self.ok = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.fell_back = 0  # failures that were retried on the other model
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.generate_seconds = 0.0
+        self.latency_ms = deque(maxlen=500)
+        self.ttft_ms = deque(maxlen=500)
+
+    def stats(self):
+        latency, ttft = sorted(self.latency_ms), sorted(self.ttft_ms)
+        return {
+            "calls": self.calls,
+            "ok": self.ok,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "fell_back": self.fell_back,
+            "latency_p50_ms": round(latency[len(latency) // 2], 1) if latency else 0.0,
+            "latency_p95_ms": round(latency[int(len(latency) * 0.95)], 1) if latency else 0.0,
+            "ttft_p50_ms": round(ttft[len(ttft) // 2], 1) if ttft else 0.0,
+            "ttft_p95_ms": round(ttft[int(len(ttft) * 0.95)], 1) if ttft else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_s": round(self.completion_tokens / self.generate_seconds, 1) if self.generate_seconds else 0.0,
+        }
+
+
+class ModelRouter:
+    """
+    Picks the small or the large model per request and falls back to the other
+    one when a call fails or times out.
+    Large: LARGE_TASKS, prompts over ROUTER_SMALL_MAX_PROMPT_TOKENS, tiers from
+    ROUTER_LARGE_MIN_TIER and complex questions. Everything else goes small.
+    Per-model latency, time to first token and token counts are kept for tuning.
+    """
+    def __init__(self, small=LLM_MODEL_SMALL, large=LLM_MODEL_LARGE, enabled=LLM_ROUTING,
+                 first_token_timeout=ROUTER_FIRST_TOKEN_TIMEOUT):
+        self.small = small
+        self.large = large
+        self.enabled = enabled
+        self.first_token_timeout = first_token_timeout
+        self.models = defaultdict(ModelStats)
+        self.routes = defaultdict(lambda: defaultdict(int))  # task -> "model (reason)" -> count
+
+    # --- ROUTING ---
+    def choose(self, task, question=None, prompt_tokens=0, tier=None):
+        """Models to try for this request, in order."""
+        if not self.enabled:
+            model, reason = self.large, "routing off"
+        elif task in LARGE_TASKS:
+            model, reason = self.large, "task"
+        elif prompt_tokens > ROUTER_SMALL_MAX_PROMPT_TOKENS:
+            model, reason = self.large, "prompt size"
+        elif tier is not None and tier >= ROUTER_LARGE_MIN_TIER:
+            model, reason = self.large, "tier"
+        elif question and is_complex(question):
+            model, reason = self.large, "complex"
+        else:
+            model, reason = self.small, "simple"
+        self.routes[task][f"{model} ({reason})"] += 1
+        fallback = self.small if model == self.large else self.large
+        return [model] if fallback == model else [model, fallback]
+
+    def _failed(self, stats, model, error, will_retry):
+        stats.failed += 1
+        if isinstance(error, asyncio.TimeoutError):
+            stats.timed_out += 1
+        if will_retry:
+            stats.fell_back += 1
+            logger.warning(f"🧭 {model} failed ({type(error).__name__}: {error}), falling back")
+
+    # --- REQUEST / RESPONSE ---
+    async def create(self, task, messages, question=None, tier=None, **kwargs):
+        """Routed llm_executor.create(); raises only if every model failed."""
+        prompt_tokens = count_message_tokens(messages)
+        models = self.choose(task, question, prompt_tokens, tier)
+        for attempt, model in enumerate(models):
+            stats = self.models[model]
+            stats.calls += 1
+            started = time.perf_counter()
+            try:
+                response = await llm_executor.create(model=model, messages=messages, **kwargs)
+            except Exception as e:
+                self._failed(stats, model, e, attempt + 1 < len(models))
+                if attempt + 1 == len(models):
+                    raise
+                continue
+
+            elapsed = time.perf_counter() - started
+            usage = getattr(response, "usage", None)
+            content = response.choices[0].message.content or ""
+            stats.ok += 1
+            stats.latency_ms.append(elapsed * 1000)
+            stats.prompt_tokens += getattr(usage, "prompt_tokens", None) or prompt_tokens
+            stats.completion_tokens += getattr(usage, "completion_tokens", None) or count_tokens(content)
+            stats.generate_seconds += elapsed
+            return response
+
+    # --- STREAMING (LIVE COPILOT) ---
+    def _open(self, model, messages, params):
+        if hedger.enabled:
+            return hedger.open(model, messages, params)
+        return open_stream(get_client(), model, messages, **params)
+
+    async def stream(self, messages, question=None, task="live", temperature=0.6, max_tokens=1024):
+        """
+        Streams the answer from the routed model (hedged across providers with LLM_HEDGING=1).
+        Falls back while nothing has been sent yet: on an error, or when the first
+        token takes longer than ROUTER_FIRST_TOKEN_TIMEOUT.
+        """
+        prompt_tokens = count_message_tokens(messages)
+        models = self.choose(task, question, prompt_tokens)
+        params = {"temperature": temperature, "max_tokens": max_tokens, "top_p": 1, "stop": None}
+        for attempt, model in enumerate(models):
+            stats = self.models[model]
+            stats.calls += 1
+            started = time.perf_counter()
+            try:
+                completion, contents, first = await asyncio.wait_for(
+                    self._open(model, messages, params), timeout=self.first_token_timeout
+                )
+            except Exception as e:
+                self._failed(stats, model, e, attempt + 1 < len(models))
+                if attempt + 1 < len(models):
+                    continue
+                logger.error(f"❌ Groq Error: {str(e)}")
+                yield f" [AI Connection Error: {str(e)}]"
+                return
+
+            first_token_at = time.perf_counter()
+            completion_tokens = 0
+            try:
+                if first is not None:
+                    completion_tokens += count_tokens(first)
+                    yield first
+                async for content in contents:
+                    completion_tokens += count_tokens(content)
+                    yield content
+            except Exception as e:
+                # Part of the answer is already on screen, so there is no retrying here
+                stats.failed += 1
+                logger.error(f"❌ Groq Error: {str(e)}")
+                yield f" [AI Connection Error: {str(e)}]"
+            else:
+                finished = time.perf_counter()
+                stats.ok += 1
+                stats.ttft_ms.append((first_token_at - started) * 1000)
+                stats.latency_ms.append((finished - started) * 1000)
+                stats.prompt_tokens += prompt_tokens
+                stats.completion_tokens += completion_tokens
+                stats.generate_seconds += finished - first_token_at
+            finally:
+                # Closes the HTTP stream when the consumer stops early (cancelled / superseded answer)
+                await completion.close()
+            return
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "small": self.small,
+            "large": self.large,
+            "models": {model: stats.stats() for model, stats in self.models.items()},
+            "routes": {task: dict(counts) for task, counts in self.routes.items()},
+        }
+
+
+model_router = ModelRouter()
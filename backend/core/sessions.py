@@ -0,0 +1,114 @@
+# backend/core/sessions.py
+import os
+import asyncio
+import logging
+import weakref
+
+from core.brain import Brain
+from core.cache import LRUCache, SQLiteStore
+
+logger = logging.getLogger("backend")
+
+# Tune with env vars; defaults fit a small Railway worker
+SESSION_MAX_USERS = int(os.getenv("SESSION_MAX_USERS", "500"))
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", str(2 * 60 * 60)))  # seconds
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # "memory" or "sqlite"
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+
+
+class SessionStore:
+    """
+    Holds one Brain per user with LRU + idle-TTL eviction and a memory budget.
+    With a backend (e.g. SQLiteStore) every saved Brain is also written through,
+    so an evicted user, or a user landing on another worker, is restored instead of rebuilt.
+    A cached Brain is only reused while the backend has nothing newer (context
+    uploaded on another worker). Backend I/O runs on worker threads.
+    """
+    def __init__(self, max_users=SESSION_MAX_USERS, idle_ttl=SESSION_IDLE_TTL,
+                 max_bytes=SESSION_MAX_BYTES, backend=None):
+        self.idle_ttl = idle_ttl
+        self.backend = backend
+        self.cache = LRUCache(
+            max_entries=max_users,
+            max_bytes=max_bytes,
+            ttl=idle_ttl,
+            sizeof=lambda brain: brain.approx_bytes(),
+            sliding_ttl=True,
+        )
+        self._versions = weakref.WeakKeyDictionary()  # Brain -> backend updated_at it was loaded/saved at
+        self._save_locks = weakref.WeakValueDictionary()  # user_id -> Lock, alive while a save holds it
+        self.created = 0
+        self.restored = 0
+        self.refreshed = 0
+
+    async def get(self, user_id: str) -> Brain:
+        """Retrieves or creates the Brain for a specific user."""
+        self.cache.sweep()
+        brain = self.cache.get(user_id)
+        if self.backend is None and brain is not None:
+            return brain
+
+        entry = None
+        if self.backend is not None:
+            newer_than = self._versions.get(brain) if brain is not None else None
+            try:
+                entry = await asyncio.to_thread(self.backend.get_entry, user_id, self.idle_ttl, newer_than)
+            except Exception as e:
+                logger.error(f"⚠️ Session backend read failed for {user_id}: {e}")
+
+        if entry is None:
+            # Another request may have created it while we were reading
+            brain = self.cache.get(user_id) or brain
+            if brain is not None:
+                return brain
+            brain = Brain()
+            self.created += 1
+            logger.info(f"🧠 Creating new Brain instance for user: {user_id}")
+        else:
+            state, updated_at = entry
+            if brain is not None:
+                self.refreshed += 1
+                logger.info(f"🔄 Newer Brain saved by another worker for user: {user_id}")
+            else:
+                self.restored += 1
+                logger.info(f"♻️ Restored Brain for user: {user_id}")
+            brain = Brain.from_dict(state)
+            self._versions[brain] = updated_at
+
+        self.cache.set(user_id, brain)
+        return brain
+
+    async def save(self, user_id: str, brain: Brain):
+        """Call after mutating a Brain so its size and the shared backend stay current."""
+        self.cache.set(user_id, brain)
+        if self.backend is None:
+            return
+        # One write per user at a time, so an older snapshot can't land after a newer one
+        lock = self._save_locks.get(user_id)
+        if lock is None:
+            lock = self._save_locks[user_id] = asyncio.Lock()
+        async with lock:
+            state = brain.to_dict()  # snapshot on the loop, written on a worker thread
+            try:
+                self._versions[brain] = await asyncio.to_thread(self.backend.set, user_id, state)
+            except Exception as e:
+                logger.error(f"⚠️ Session backend write failed for {user_id}: {e}")
+
+    def stats(self):
+        return {
+            **self.cache.stats(),
+            "created": self.created,
+            "restored": self.restored,
+            "refreshed": self.refreshed,
+            "backend": type(self.backend).__name__ if self.backend is not None else "memory",
+        }
+
+
+def create_session_store() -> SessionStore:
+    backend = None
+    if SESSION_BACKEND == "sqlite":
+        backend = SQLiteStore(SESSION_DB_PATH, table="brains")
+        backend.prune(max_age=SESSION_IDLE_TTL)
+        logger.info(f"🗄️ Sharing sessions through SQLite at {SESSION_DB_PATH}")
+    return SessionStore(backend=backend)
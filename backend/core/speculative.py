@@ -0,0 +1,190 @@
+# backend/core/speculative.py
+import os
+import re
+import asyncio
+import logging
+from difflib import SequenceMatcher
+
+from core.tokens import count_tokens
+
+logger = logging.getLogger("backend")
+
+SPECULATIVE_ANSWERS = os.getenv("SPECULATIVE_ANSWERS", "1") == "1"
+# Interim transcripts shorter than this are too early to guess the question
+SPECULATIVE_MIN_WORDS = int(os.getenv("SPECULATIVE_MIN_WORDS", "4"))
+# Word-level similarity needed to reuse a speculation for the final transcript
+SPECULATIVE_MATCH_RATIO = float(os.getenv("SPECULATIVE_MATCH_RATIO", "0.85"))
+# Tokens generated for discarded speculations before speculation is switched off for the session
+SPECULATIVE_WASTE_TOKEN_CAP = int(os.getenv("SPECULATIVE_WASTE_TOKEN_CAP", "1500"))
+
+_NON_WORD = re.compile(r"[^a-z0-9' ]+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, normalize(a).split(), normalize(b).split()).ratio()
+
+
+class Speculation:
+    """
+    One background generation whose chunks are buffered until it is committed or dropped.
+    With `slots` (the user's ResponseManager semaphore) the stream is only opened
+    once a generation slot is held, so speculation counts against MAX_GENERATIONS_PER_USER.
+    """
+    def __init__(self, text, prompt, chunks, slots=None):
+        self.text = text
+        self.prompt = prompt  # what was sent to the model; the caller records it on commit
+        self.tokens = 0
+        self._slots = slots
+        self._holds_slot = False
+        self._handed_over = False
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(chunks))
+        self._task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"⚠️ Speculative generation failed: {task.exception()}")
+
+    async def _run(self, chunks):
+        try:
+            if self._slots is not None and not self._handed_over:
+                await self._slots.acquire()
+                self._holds_slot = True
+                if self._handed_over:
+                    self.hand_over()
+            async for chunk in chunks:
+                self.tokens += count_tokens(chunk)
+                self._queue.put_nowait(chunk)
+        finally:
+            self.hand_over()
+            self._queue.put_nowait(None)
+            await chunks.aclose()
+
+    async def stream(self):
+        """Replays what was buffered so far, then follows the live generation."""
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def hand_over(self):
+        """Give the slot back; the answer that commits this speculation runs under its own."""
+        self._handed_over = True
+        if self._holds_slot:
+            self._holds_slot = False
+            self._slots.release()
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class SpeculativeResponder:
+    """
+    Starts answering on stable interim transcripts instead of waiting for the final
+    result + utterance end. If the final transcript matches, the already-running
+    answer is committed (with its buffered head start); otherwise it is cancelled.
+    Wasted tokens are capped per session.
+    """
+    def __init__(self, generate, should_answer=None, slots=None, enabled=SPECULATIVE_ANSWERS,
+                 waste_cap=SPECULATIVE_WASTE_TOKEN_CAP):
+        self.generate = generate  # text -> (prompt, async iterator of answer chunks)
+        self.should_answer = should_answer  # text -> False when the final would be gated (filler, chit-chat)
+        self.slots = slots  # the user's generation slots (ResponseManager.slots)
+        self.enabled = enabled
+        self.waste_cap = waste_cap
+        self.current = None
+        self._last_interim = ""
+
+        # Metrics
+        self.started = 0
+        self.gated = 0
+        self.no_slot = 0
+        self.committed = 0
+        self.discarded = 0
+        self.wasted_tokens = 0
+
+    def on_interim(self, text: str):
+        """Feed every interim transcript (prefixed with any finals not yet answered)."""
+        if not self.enabled or len(text.split()) < SPECULATIVE_MIN_WORDS:
+            self._last_interim = text
+            return
+
+        # "Stable" = Deepgram repeated the same interim (speaker paused) or it reads as a question
+        stable = normalize(text) == normalize(self._last_interim) or text.strip().endswith("?")
+        self._last_interim = text
+        if not stable:
+            return
+
+        if self.current is not None:
+            if similarity(self.current.text, text) >= SPECULATIVE_MATCH_RATIO:
+                return  # Still answering the right question
+            self._discard()
+            if not self.enabled:
+                return
+        if self.should_answer is not None and not self.should_answer(text):
+            self.gated += 1
+            return
+        if self.slots is not None and self.slots.locked():
+            self.no_slot += 1  # an answer is streaming (here or on another socket of this user)
+            return
+
+        self.current = Speculation(text, *self.generate(text), self.slots)
+        self.started += 1
+        logger.info(f"🔮 Speculating on: {text}")
+
+    def hand_over(self):
+        """
+        Call before submitting a final transcript to ResponseManager: its run waits for
+        a slot, which must not be the one this session's speculation is holding.
+        """
+        if self.current is not None:
+            self.current.hand_over()
+
+    def take(self, final_text: str):
+        """Returns the speculation to commit for this final transcript, or None."""
+        self._last_interim = ""
+        spec, self.current = self.current, None
+        if spec is None:
+            return None
+        if similarity(spec.text, final_text) >= SPECULATIVE_MATCH_RATIO:
+            self.committed += 1
+            return spec
+        self.current = spec
+        self._discard()
+        return None
+
+    def drop(self, final_text: str):
+        """The final transcript needs no answer: stop any speculation on it."""
+        self._last_interim = ""
+        if self.current is not None and similarity(self.current.text, final_text) >= SPECULATIVE_MATCH_RATIO:
+            self._discard()
+
+    def cancel(self):
+        if self.current is not None:
+            self._discard()
+
+    def _discard(self):
+        spec, self.current = self.current, None
+        spec.cancel()
+        self.discarded += 1
+        self.wasted_tokens += spec.tokens
+        if self.wasted_tokens >= self.waste_cap and self.enabled:
+            self.enabled = False
+            logger.info(f"🔮 Speculation disabled for this session ({self.wasted_tokens} tokens wasted)")
+
+    def stats(self):
+        return {
+            "started": self.started,
+            "gated": self.gated,
+            "no_slot": self.no_slot,
+            "committed": self.committed,
+            "discarded": self.discarded,
+            "wasted_tokens": self.wasted_tokens,
+            "enabled": self.enabled,
+        }
@@ -0,0 +1,133 @@
+# backend/core/streaming.py
+import os
+import json
+import asyncio
+import logging
+
+logger = logging.getLogger("backend")
+
+try:
+    import orjson
+
+    def dumps(payload) -> str:
+        return orjson.dumps(payload).decode()
+except ImportError:  # orjson is optional, stdlib json is the fallback
+    def dumps(payload) -> str:
+        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+# Coalesce ai_chunk tokens for this long (or until this many bytes) before sending a frame
+AI_CHUNK_WINDOW_MS = int(os.getenv("AI_CHUNK_WINDOW_MS", "30"))
+AI_CHUNK_MAX_BYTES = int(os.getenv("AI_CHUNK_MAX_BYTES", "512"))
+# Frames waiting for a slow client before producers are made to wait (backpressure)
+OUTBOX_MAX_FRAMES = int(os.getenv("OUTBOX_MAX_FRAMES", "64"))
+
+
+class FrameBatcher:
+    """
+    Single outbound writer for one live socket.
+    Streamed `ai_chunk` tokens are merged into one frame per time/byte window,
+    other events are sent in order right after any pending text.
+    A bounded queue gives per-socket backpressure: a slow client slows its own
+    producer instead of growing server memory.
+    """
+    def __init__(self, websocket, window_ms=AI_CHUNK_WINDOW_MS, max_bytes=AI_CHUNK_MAX_BYTES,
+                 max_frames=OUTBOX_MAX_FRAMES):
+        self.websocket = websocket
+        self.window = window_ms / 1000
+        self.max_bytes = max_bytes
+        self._frames = asyncio.Queue(maxsize=max_frames)
+        self._parts = []
+        self._size = 0
+        self._timer = None
+        self._closed = False
+        self._sender = asyncio.create_task(self._send_loop())
+
+        # Metrics
+        self.chunks_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+
+    async def add_chunk(self, text: str):
+        """Queue one streamed token for the current answer."""
+        if self._closed:
+            raise RuntimeError("Socket closed")
+        self.chunks_in += 1
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.max_bytes:
+            await self._flush_chunks()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._on_window_elapsed)
+
+    async def send_event(self, payload: dict):
+        """Send a control/transcript event, preserving order with pending chunks."""
+        if self._closed:
+            raise RuntimeError("Socket closed")
+        await self._flush_chunks()
+        await self._frames.put(dumps(payload))
+
+    async def flush(self):
+        await self._flush_chunks()
+
+    def _on_window_elapsed(self):
+        self._timer = None
+        if self._parts and not self._closed:
+            asyncio.ensure_future(self._flush_chunks())
+
+    async def _flush_chunks(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._parts:
+            return
+        # Take the buffer before awaiting so later tokens start a new frame
+        text = "".join(self._parts)
+        self._parts = []
+        self._size = 0
+        await self._frames.put(dumps({"event": "ai_chunk", "text": text}))
+
+    async def _send_loop(self):
+        while True:
+            frame = await self._frames.get()
+            try:
+                await self.websocket.send_text(frame)
+                self.frames_out += 1
+                self.bytes_out += len(frame)
+            except Exception as e:
+                # Client went away: stop accepting frames, producers see RuntimeError
+                logger.warning(f"Outbox send failed, closing: {e}")
+                self._closed = True
+                self._frames.task_done()
+                self._discard_queued()
+                return
+            self._frames.task_done()
+
+    def _discard_queued(self):
+        # Unblocks producers stuck on a full queue; their next call raises RuntimeError
+        while not self._frames.empty():
+            self._frames.get_nowait()
+            self._frames.task_done()
+
+    async def close(self, timeout: float = 2.0):
+        """Flush what's left (best effort) and stop the sender."""
+        if not self._closed:
+            try:
+                await asyncio.wait_for(self._drain(), timeout)
+            except (asyncio.TimeoutError, RuntimeError):
+                pass
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self._sender.cancel()
+
+    async def _drain(self):
+        await self._flush_chunks()
+        await self._frames.join()
+
+    def stats(self):
+        return {
+            "chunks_in": self.chunks_in,
+            "frames_out": self.frames_out,
+            "bytes_out": self.bytes_out,
+            "queued_frames": self._frames.qsize(),
+        }
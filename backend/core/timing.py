@@ -0,0 +1,51 @@
+# backend/core/timing.py
+import sys
+import time
+import logging
+import importlib
+from contextlib import contextmanager
+
+logger = logging.getLogger("backend")
+
+# Heavy SDKs imported on first use instead of at boot: module -> import ms
+import_timings = {}
+
+
+def lazy_import(module_name: str):
+    """importlib.import_module that records how long the first (uncached) import took."""
+    if module_name in sys.modules:
+        return importlib.import_module(module_name)
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_timings[module_name] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"⏱️ Imported {module_name} in {import_timings[module_name]:.0f}ms (first use)")
+    return module
+
+
+class StageTimer:
+    """Collects wall-clock durations of named pipeline stages for one request."""
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, stage_name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage_name] = (time.perf_counter() - started) * 1000
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        """Value for the standard Server-Timing response header."""
+        parts = [f"{stage};dur={ms:.1f}" for stage, ms in self.stages.items()]
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(parts)
+
+    def log(self):
+        stages = " | ".join(f"{stage} {ms:.0f}ms" for stage, ms in self.stages.items())
+        logger.info(f"⏱️ {self.name}: {stages} | total {self.total_ms():.0f}ms")
@@ -0,0 +1,19 @@
+# backend/core/tokens.py
+import math
+
+# Llama-3 style BPE averages roughly 4 characters per token on English prose.
+# Good enough for budgeting without pulling a tokenizer into the worker.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators per chat message
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate for budgeting prompts."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(messages) -> int:
+    """Estimated prompt size of a chat message list."""
+    return sum(count_tokens(msg["content"]) + MESSAGE_OVERHEAD_TOKENS for msg in messages)
@@ -0,0 +1,227 @@
+# backend/core/utterances.py
+import os
+import re
+import time
+import zlib
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from core.speculative import normalize
+
+logger = logging.getLogger("backend")
+
+UTTERANCE_GATE = os.getenv("UTTERANCE_GATE", "1") == "1"
+# Longer utterances always go to the LLM; the model only judges short ones
+UTTERANCE_GATE_MAX_WORDS = int(os.getenv("UTTERANCE_GATE_MAX_WORDS", "8"))
+# Cosine similarity to the nearest labelled example needed to skip the LLM
+UTTERANCE_GATE_MIN_SIMILARITY = float(os.getenv("UTTERANCE_GATE_MIN_SIMILARITY", "0.6"))
+
+FEATURE_DIM = 2048  # hashed unigrams + bigrams
+
+# Whole utterance made of these words is filler, whatever the model says
+_FILLER_WORDS = frozenset("""
+ok okay okey great right alright sure yeah yes yep yup hmm hm mhm mm uh um uhm ah oh huh cool nice good
+perfect awesome excellent wonderful fantastic gotcha got it i see thanks thank you so well then and
+interesting fair enough understood makes sense sounds
+""".split())
+
+# Interview cues: never filtered, however short ("why?", "tell me more")
+_QUESTION_CUES = re.compile(
+    r"\b(why|tell me|elaborate|example|explain|describe|walk me|experience|project|design|difference|"
+    r"how (would|did|do|does|can|could|should|many|much|long)|what (would|did|do|does|is|was|are|were|if|kind))\b"
+)
+
+TEMPLATES = {
+    "hear_check": "Yes, I can hear you clearly.",
+    "screen_check": "Yes, I can see it.",
+    "greeting": "Hi! Thanks for having me.",
+    "how_are_you": "I'm doing well, thank you for asking! How are you?",
+    "nice_to_meet": "Nice to meet you too!",
+    "thanks_for_joining": "Thank you for having me, I'm excited to be here.",
+    "closing": "Thank you so much for your time, I really enjoyed our conversation.",
+}
+
+# Labelled seed set for the nearest-neighbour model. "question" examples are
+# there to pull look-alikes ("how are you" vs "how did you") away from chit-chat,
+# "phatic" ones ("okay great") away from the templates ("great to meet you").
+EXAMPLES = {
+    "phatic": [
+        "okay", "okay great", "great", "right", "sure", "alright", "got it", "i see", "cool", "perfect",
+        "sounds good", "that makes sense", "interesting", "okay thank you", "uh huh", "okay so",
+        "let me see", "one second", "give me a moment", "let me check", "let me share my screen", "just a sec",
+        "bear with me", "okay let's move on", "moving on", "let's move on", "very good", "fair enough",
+        "no worries", "that's great", "let me pull up your resume", "i'm taking notes", "let me write that down",
+        "okay next question", "all right", "good to know", "that's fine", "no problem",
+    ],
+    "hear_check": [
+        "can you hear me", "can you hear me now", "can you hear me okay", "are you able to hear me",
+        "is my audio okay", "is my audio working", "do you hear me", "am i audible", "are you there",
+        "hello are you there", "is the sound okay", "am i coming through", "can you hear me clearly",
+    ],
+    "screen_check": [
+        "can you see my screen", "is my screen visible", "can you see this", "are you able to see my screen",
+        "do you see my screen", "can you see me", "is my video working", "can you see the document",
+    ],
+    "greeting": [
+        "hi", "hello", "hey", "hi there", "hello there", "good morning", "good afternoon", "good evening",
+        "hey there", "welcome", "hi welcome",
+    ],
+    "how_are_you": [
+        "how are you", "how are you doing", "how are you doing today", "how's it going", "how is your day going",
+        "how's your day", "how has your day been", "hi how are you", "hello how are you", "how's your week going",
+    ],
+    "nice_to_meet": [
+        "nice to meet you", "pleasure to meet you", "great to meet you", "good to meet you",
+        "it's nice to meet you", "lovely to meet you",
+    ],
+    "thanks_for_joining": [
+        "thanks for joining", "thank you for joining us today", "thanks for taking the time",
+        "thanks for coming in", "thanks for making the time", "thank you for coming", "thanks for being here",
+        "thanks so much for joining today", "thank you for taking the time to speak with us",
+    ],
+    "closing": [
+        "that's all i have", "that's all from my side", "we'll be in touch", "have a great day",
+        "it was nice talking to you", "thanks for your time today", "we'll get back to you", "that's it from me",
+    ],
+    "question": [
+        "do you have any questions for me", "do you have any questions for us", "how many years of experience",
+        "what's your salary expectation", "when can you start", "are you comfortable with sql",
+        "have you used kubernetes", "what are your strengths", "tell me more", "can you elaborate",
+        "what do you mean", "go on", "and then what happened", "what was the outcome", "how so",
+        "what tools did you use", "can you give an example", "what was your role", "are you familiar with react",
+        "how are you with python", "how are you handling deadlines", "can you code in java",
+        "what about testing", "and the database", "which cloud provider", "any questions",
+    ],
+}
+
+Verdict = namedtuple("Verdict", "action intent reply similarity")  # action: "answer" | "reply" | "drop"
+
+
+def _features(text: str):
+    words = normalize(text).split()
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(FEATURE_DIM, dtype=np.float32)
+    for gram in grams:
+        vector[zlib.crc32(gram.encode()) % FEATURE_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class UtteranceClassifier:
+    """
+    Decides whether a finished utterance needs an LLM answer.
+    Rules catch pure filler (the only thing dropped) and clear interview cues;
+    the rest (short ones only) goes to a nearest-neighbour model over hashed
+    unigram + bigram vectors of EXAMPLES, which can only pick a template reply
+    for utterances made of chit-chat words.
+    Anything unfamiliar or long is treated as a question.
+    """
+    def __init__(self, examples=None, max_words=UTTERANCE_GATE_MAX_WORDS,
+                 min_similarity=UTTERANCE_GATE_MIN_SIMILARITY, enabled=UTTERANCE_GATE):
+        self.examples = examples or EXAMPLES
+        self.max_words = max_words
+        self.min_similarity = min_similarity
+        self.enabled = enabled
+        self._matrix = None  # (examples, FEATURE_DIM), built on first use
+        self._labels = []
+        self._chitchat_words = set()  # every word of the non-question examples
+
+        # Metrics (all sessions)
+        self.counts = {"answer": 0, "reply": 0, "drop": 0}
+        self.total_classify = 0.0
+
+    def _fit(self):
+        labels, rows = [], []
+        for intent, texts in self.examples.items():
+            for text in texts:
+                labels.append(intent)
+                rows.append(_features(text))
+                if intent != "question":
+                    self._chitchat_words.update(normalize(text).split())
+        self._labels = labels
+        self._matrix = np.stack(rows)
+
+    def classify(self, text: str, record: bool = True) -> Verdict:
+        """`record=False` for lookahead checks (interims) that must not count as avoided calls."""
+        started = time.perf_counter()
+        verdict = self._classify(text)
+        if record:
+            self.total_classify += time.perf_counter() - started
+            self.counts[verdict.action] += 1
+        return verdict
+
+    def _classify(self, text):
+        normalized = normalize(text)
+        words = normalized.split()
+        if not self.enabled:
+            return Verdict("answer", "question", None, 0.0)
+        if not words or all(word in _FILLER_WORDS for word in words):
+            return Verdict("drop", "phatic", None, 1.0)
+        if len(words) > self.max_words or _QUESTION_CUES.search(normalized):
+            return Verdict("answer", "question", None, 0.0)
+
+        if self._matrix is None:
+            self._fit()
+        similarities = self._matrix @ _features(normalized)
+        best = int(np.argmax(similarities))
+        intent, similarity = self._labels[best], float(similarities[best])
+        # Only the all-filler rule drops: a phatic neighbour can still carry a question
+        # ("Got it. And Kafka?"), so it goes to the LLM like anything unfamiliar
+        if intent in ("question", "phatic") or similarity < self.min_similarity:
+            return Verdict("answer", "question", None, similarity)
+        # A template only replaces the answer when the utterance is all chit-chat ("Hi, nice to meet you. Kafka?" isn't)
+        if any(word not in self._chitchat_words and word not in _FILLER_WORDS for word in words):
+            return Verdict("answer", "question", None, similarity)
+        return Verdict("reply", intent, TEMPLATES[intent], similarity)
+
+    def stats(self):
+        classified = sum(self.counts.values())
+        return {
+            "enabled": self.enabled,
+            **self.counts,
+            "llm_calls_avoided": self.counts["reply"] + self.counts["drop"],
+            "avg_classify_us": round(self.total_classify / classified * 1e6, 1) if classified else 0.0,
+        }
+
+
+class UtteranceGate:
+    """Per-session front of the answer pipeline: counts what it kept away from the LLM."""
+    def __init__(self, classifier=None):
+        self.classifier = classifier or utterance_classifier
+
+        # Metrics
+        self.utterances = 0
+        self.answered = 0
+        self.replied = 0
+        self.dropped = 0
+
+    def check(self, text: str) -> Verdict:
+        verdict = self.classifier.classify(text)
+        self.utterances += 1
+        if verdict.action == "answer":
+            self.answered += 1
+        elif verdict.action == "reply":
+            self.replied += 1
+        else:
+            self.dropped += 1
+        if verdict.action != "answer":
+            logger.info(f"🚦 Skipping LLM for '{text}' ({verdict.intent}, {verdict.similarity:.2f})")
+        return verdict
+
+    def would_answer(self, text: str) -> bool:
+        """Same decision as check() for a transcript that isn't final yet; not counted."""
+        return self.classifier.classify(text, record=False).action == "answer"
+
+    def stats(self):
+        return {
+            "utterances": self.utterances,
+            "answered": self.answered,
+            "template_replies": self.replied,
+            "dropped": self.dropped,
+            "llm_calls_avoided": self.replied + self.dropped,
+        }
+
+
+utterance_classifier = UtteranceClassifier()
@@ -0,0 +1,165 @@
+# backend/core/vad_service.py
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger("backend")
+
+# Run one batched VAD pass for all live streams this often
+VAD_TICK_MS = int(os.getenv("VAD_TICK_MS", "20"))
+# Share one batched Silero pass across local-STT sessions (0 = per-session calls)
+VAD_BATCHING = os.getenv("VAD_BATCHING", "1") == "1"
+
+FRAME_SAMPLES = 512     # Silero step at 16 kHz
+CONTEXT_SAMPLES = 64    # Silero v5 prepends the tail of the previous frame
+STATE_SHAPE = (2, 128)  # LSTM state per stream
+_FLUSH = object()       # queued after a stream's last frame
+
+
+class VADStream:
+    """One session's view of the shared VAD: its own recurrent state, frames and buffer."""
+    def __init__(self, service, buffer, on_utterance):
+        self.service = service
+        self.buffer = buffer              # SmartAudioBuffer fed with accept(frame, prob)
+        self.on_utterance = on_utterance  # called on the VAD thread with each finished utterance
+        self.state = np.zeros(STATE_SHAPE, dtype=np.float32)
+        self.context = np.zeros(CONTEXT_SAMPLES, dtype=np.float32)
+        self.pending = deque()
+        self.finished = threading.Event()
+
+    def push(self, frame: np.ndarray):
+        self.pending.append(frame)
+        self.service._wake.set()
+
+    def finish(self, timeout: float = 5.0) -> bool:
+        """
+        Ends the stream: once every pushed frame has gone through, the VAD thread
+        flushes the buffer (the buffer is only ever touched on that thread) and
+        hands the tail to on_utterance. Blocks until then; False on timeout.
+        """
+        self.push(_FLUSH)
+        finished = self.finished.wait(timeout)
+        self.close()
+        return finished
+
+    def close(self):
+        self.service._streams.discard(self)
+
+
+class BatchedVAD:
+    """
+    Shared Silero VAD for every local-STT session.
+    Instead of one 512-sample forward pass per frame per session, the VAD thread
+    wakes every VAD_TICK_MS, stacks the next pending frame of every stream and
+    runs one batched pass, repeating until the queues are empty. Each stream
+    keeps its own LSTM state and context, so sessions never leak into each other.
+    Probabilities go back to each stream's SmartAudioBuffer.accept().
+    """
+    def __init__(self, tick_ms=VAD_TICK_MS):
+        self.tick = tick_ms / 1000
+        self._streams = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._model = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.passes = 0
+        self.frames = 0
+        self.busy_seconds = 0.0
+
+    def open_stream(self, buffer, on_utterance) -> VADStream:
+        self._ensure_started()
+        stream = VADStream(self, buffer, on_utterance)
+        self._streams.add(stream)
+        return stream
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    from smart_audio import get_vad_model
+                    self._model = get_vad_model()._model  # the 16 kHz network; takes state explicitly
+                    self._thread = threading.Thread(target=self._loop, name="vad-batcher", daemon=True)
+                    self._thread.start()
+
+    # --- BATCHED INFERENCE ---
+    def infer(self, frames: np.ndarray, states: np.ndarray, contexts: np.ndarray):
+        """frames (B, 512), states (2, B, 128), contexts (B, 64) -> (probs (B,), new states)."""
+        import torch
+
+        x = torch.from_numpy(np.concatenate((contexts, frames), axis=1))
+        with torch.inference_mode():
+            out, new_state = self._model(x, torch.from_numpy(states))
+        return out.numpy().reshape(-1), new_state.numpy()
+
+    def _flush(self, stream):
+        stream.pending.popleft()
+        try:
+            tail = stream.buffer.flush()
+            if tail is not None:
+                stream.on_utterance(tail)
+        except Exception as e:
+            logger.error(f"VAD utterance handler error: {e}")
+        stream.finished.set()
+
+    def step(self, streams):
+        """One batched pass over the next frame of each given stream."""
+        frames = np.stack([stream.pending.popleft() for stream in streams])
+        states = np.stack([stream.state for stream in streams], axis=1)
+        contexts = np.stack([stream.context for stream in streams])
+        probs, states = self.infer(frames, states, contexts)
+
+        for i, stream in enumerate(streams):
+            stream.state = states[:, i]
+            stream.context = frames[i, -CONTEXT_SAMPLES:]
+            utterance = stream.buffer.accept(frames[i], float(probs[i]))
+            if utterance is not None:
+                try:
+                    stream.on_utterance(utterance)
+                except Exception as e:
+                    logger.error(f"VAD utterance handler error: {e}")
+        self.passes += 1
+        self.frames += len(streams)
+
+    def _loop(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.tick)  # let frames from other sessions arrive for the same pass
+            self._wake.clear()
+            started = time.perf_counter()
+            while True:
+                ready = [stream for stream in list(self._streams) if stream.pending]
+                if not ready:
+                    break
+                for stream in ready:
+                    if stream.pending[0] is _FLUSH:
+                        self._flush(stream)
+                ready = [stream for stream in ready if stream.pending and stream.pending[0] is not _FLUSH]
+                if not ready:
+                    continue
+                try:
+                    self.step(ready)
+                except Exception as e:
+                    logger.error(f"⚠️ Batched VAD pass failed: {e}")
+                    for stream in ready:
+                        # Drop the frames but keep an end-of-stream marker, so finish() still returns
+                        while stream.pending and stream.pending[0] is not _FLUSH:
+                            stream.pending.popleft()
+            self.busy_seconds += time.perf_counter() - started
+
+    def stats(self):
+        return {
+            "streams": len(self._streams),
+            "passes": self.passes,
+            "frames": self.frames,
+            "avg_batch": round(self.frames / self.passes, 2) if self.passes else 0.0,
+            "frames_per_busy_second": round(self.frames / self.busy_seconds) if self.busy_seconds else 0,
+        }
+
+
+batched_vad = BatchedVAD()
@@ -0,0 +1,209 @@
+# backend/core/whisper_pool.py
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from transcriber import SAMPLE_RATE
+
+logger = logging.getLogger("backend")
+
+_CORES = os.cpu_count() or 1
+# Whisper worker processes (0 = transcribe in the session thread, no batching)
+WHISPER_POOL_WORKERS = int(os.getenv("WHISPER_POOL_WORKERS", str(max(1, _CORES // 4))))
+# CTranslate2 threads per worker; by default the cores are split evenly between workers
+WHISPER_POOL_CPU_THREADS = int(os.getenv("WHISPER_POOL_CPU_THREADS", str(max(1, _CORES // max(WHISPER_POOL_WORKERS, 1)))))
+# A batch closes when it is this full or its oldest utterance has waited this long
+WHISPER_BATCH_MAX = int(os.getenv("WHISPER_BATCH_MAX", "8"))
+WHISPER_BATCH_DEADLINE_MS = int(os.getenv("WHISPER_BATCH_DEADLINE_MS", "60"))
+
+
+def _init_worker(cpu_threads):
+    # Load the model once per worker, before the first batch arrives
+    from transcriber import get_model
+    get_model(cpu_threads=cpu_threads, num_workers=1)
+
+
+def _worker_load_info():
+    from transcriber import get_model, load_info
+    get_model()
+    return dict(load_info)
+
+
+def _run_batch(audios):
+    from transcriber import transcribe_batch
+    started = time.perf_counter()
+    texts = transcribe_batch(audios)
+    return texts, time.perf_counter() - started
+
+
+class _Job:
+    __slots__ = ("audio", "future", "enqueued")
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class WhisperScheduler:
+    """
+    Shared local-STT inference for all live sessions.
+    Utterances are collected into micro-batches (WHISPER_BATCH_MAX, or whatever
+    arrived within WHISPER_BATCH_DEADLINE_MS of the oldest one) and each batch
+    runs as one encoder/decoder pass on a worker process. While every worker is
+    busy, new utterances keep queueing, so batches grow with load.
+    Thread-safe: submit() can be called from any session thread.
+    """
+    def __init__(self, workers=WHISPER_POOL_WORKERS, cpu_threads=WHISPER_POOL_CPU_THREADS,
+                 max_batch=WHISPER_BATCH_MAX, deadline_ms=WHISPER_BATCH_DEADLINE_MS):
+        self.workers = workers
+        self.cpu_threads = cpu_threads
+        self.max_batch = max_batch
+        self.deadline = deadline_ms / 1000
+        self._jobs = queue.Queue()
+        self._slots = threading.Semaphore(workers)
+        self._pool = None
+        self._batcher = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.batches = 0
+        self.utterances = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.total_inference = 0.0
+        self.total_audio = 0.0
+        self.recent = deque(maxlen=20)  # per-batch reports
+        self.worker_loads = []
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: the server process may already run torch/OpenMP threads, which don't survive fork
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(self.cpu_threads,))
+        return self._pool
+
+    def _ensure_started(self):
+        if self._batcher is None:
+            with self._lock:
+                if self._batcher is None:
+                    self._get_pool()
+                    self._batcher = threading.Thread(target=self._batch_loop, name="whisper-batcher", daemon=True)
+                    self._batcher.start()
+
+    def submit(self, audio) -> Future:
+        """Queue one 16 kHz float32 utterance; the future resolves to its text."""
+        self._ensure_started()
+        job = _Job(audio)
+        self._jobs.put(job)
+        return job.future
+
+    def transcribe(self, audio) -> str:
+        return self.submit(audio).result()
+
+    def warm_up(self):
+        """Starts the workers and waits for their models to load (blocking; run it in a thread)."""
+        self._ensure_started()
+        futures = [self._get_pool().submit(_worker_load_info) for _ in range(self.workers)]
+        self.worker_loads = [future.result() for future in futures]
+        logger.info(f"🔥 Whisper workers ready: {self.worker_loads}")
+
+    # --- BATCHING ---
+    def _batch_loop(self):
+        while True:
+            first = self._jobs.get()
+            if first is None:
+                return
+            self._slots.acquire()  # wait for a free worker; the queue keeps filling meanwhile
+            batch = [first]
+            closes_at = first.enqueued + self.deadline
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._jobs.get(timeout=max(closes_at - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._jobs.put(None)
+                    break
+                batch.append(job)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        dispatched = time.monotonic()
+        try:
+            future = self._get_pool().submit(_run_batch, [job.audio for job in batch])
+        except Exception as e:
+            self._slots.release()
+            self._fail(batch, e)
+            return
+        future.add_done_callback(lambda done: self._on_batch_done(batch, dispatched, done))
+
+    def _on_batch_done(self, batch, dispatched, done):
+        self._slots.release()
+        try:
+            texts, inference = done.result()
+        except BrokenProcessPool as e:
+            # A crashed worker poisons the pool; the next batch gets a fresh one
+            self._pool = None
+            self._fail(batch, e)
+            return
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        audio_seconds = sum(len(job.audio) for job in batch) / SAMPLE_RATE
+        waits = [dispatched - job.enqueued for job in batch]
+        for job, text in zip(batch, texts):
+            job.future.set_result(text)
+
+        self.batches += 1
+        self.utterances += len(batch)
+        self.total_wait += sum(waits)
+        self.total_inference += inference
+        self.total_audio += audio_seconds
+        report = {
+            "size": len(batch),
+            "max_wait_ms": round(max(waits) * 1000, 1),
+            "inference_ms": round(inference * 1000, 1),
+            "rtf": round(inference / audio_seconds, 3) if audio_seconds else 0.0,
+        }
+        self.recent.append(report)
+        logger.info(f"🧠 Whisper batch {report}")
+
+    def _fail(self, batch, error):
+        self.failed += len(batch)
+        logger.error(f"⚠️ Whisper batch of {len(batch)} failed: {error}")
+        for job in batch:
+            job.future.set_exception(error)
+
+    def shutdown(self):
+        if self._batcher is not None:
+            self._jobs.put(None)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "cpu_threads": self.cpu_threads,
+            "queued": self._jobs.qsize(),
+            "batches": self.batches,
+            "utterances": self.utterances,
+            "failed": self.failed,
+            "avg_batch_size": round(self.utterances / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_wait_ms": round(self.total_wait / self.utterances * 1000, 1) if self.utterances else 0.0,
+            "avg_inference_ms": round(self.total_inference / self.batches * 1000, 1) if self.batches else 0.0,
+            "rtf": round(self.total_inference / self.total_audio, 3) if self.total_audio else 0.0,
+            "recent_batches": list(self.recent),
+            "worker_model_loads": self.worker_loads,
+        }
+
+
+whisper_scheduler = WhisperScheduler()
@@ -0,0 +1,57 @@
+"""
+Fetches the local STT models into MODELS_DIR (default backend/models) so that
+workers load them from disk and never reach the network at runtime.
+
+- Silero VAD: copied from the installed silero-vad package, or downloaded from
+  the pinned GitHub tag.
+- faster-whisper: the WHISPER_MODEL snapshot at WHISPER_MODEL_REVISION (the
+  default model is pinned in transcriber.py) into models/faster-whisper-<name>.
+
+Runs once per image build (the Dockerfile's LOCAL_STT=1 step).
+Usage: python download_models.py [--skip-whisper] [--skip-vad]
+"""
+import os
+import shutil
+import argparse
+import urllib.request
+
+import transcriber
+import smart_audio
+
+SILERO_VAD_URL = (f"https://github.com/snakers4/silero-vad/raw/{smart_audio.SILERO_VAD_VERSION}"
+                  "/src/silero_vad/data/silero_vad.jit")
+
+
+def fetch_vad():
+    target = smart_audio.SILERO_VAD_PATH
+    if os.path.exists(target):
+        print(f"✅ Silero VAD already at {target}")
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        import silero_vad
+        source = os.path.join(os.path.dirname(silero_vad.__file__), "data", "silero_vad.jit")
+        shutil.copyfile(source, target)
+    except ImportError:
+        source = SILERO_VAD_URL
+        urllib.request.urlretrieve(source, target)
+    print(f"✅ Silero VAD: {source} -> {target}")
+
+
+def fetch_whisper():
+    from faster_whisper import download_model
+
+    target = transcriber.WHISPER_MODEL_PATH
+    path = download_model(transcriber.WHISPER_MODEL, output_dir=target, revision=transcriber.WHISPER_MODEL_REVISION)
+    print(f"✅ Whisper '{transcriber.WHISPER_MODEL}' (revision {transcriber.WHISPER_MODEL_REVISION or 'latest'}) -> {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip-vad", action="store_true")
+    parser.add_argument("--skip-whisper", action="store_true")
+    args = parser.parse_args()
+    if not args.skip_vad:
+        fetch_vad()
+    if not args.skip_whisper:
+        fetch_whisper()
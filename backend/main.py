@@ -2,53 +2,83 @@ import os
 import logging
 import asyncio
 import json
-import io
-import re
 import hashlib
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, Request,HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from dotenv import load_dotenv
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime, timedelta
-
-from docx import Document
-from docx.shared import Pt, Inches, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-
-# --- SUPABASE & STRIPE ---
-from supabase import create_client, Client
-import stripe
-
-# --- DEEPGRAM ---
-from deepgram import (
-    DeepgramClient,
-    DeepgramClientOptions,
-    LiveTranscriptionEvents,
-    LiveOptions,
-)
-
-# --- DOCUMENT PARSERS ---
-from pypdf import PdfReader  # Reverted back to your original pypdf
-from docx import Document
+import threading
+from core.timing import StageTimer, lazy_import, import_timings
+
+# Boot report: how long each import group takes (logged once the app is up, also at GET /metrics).
+# Supabase, Stripe, Deepgram, Groq and python-docx are imported on first use, see lazy_import
+# (the lifespan warms the ones live traffic needs on worker threads).
+boot = StageTimer("Boot")
+
+with boot.stage("framework"):
+    from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, Request,HTTPException
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import Response
+    from dotenv import load_dotenv
+    from pydantic import BaseModel
+    from typing import List, Optional
+    from datetime import datetime, timedelta
+    from contextlib import asynccontextmanager
 
 # --- INTERNAL MODULES ---
-from core.brain import Brain
-from core.llm import stream_completion
-
-# --- NEW: AI CLIENT FOR COACH ---
-from groq import Groq 
+with boot.stage("core"):
+    from core.sessions import create_session_store
+    from core.coach import create_coach_store, get_difficulty_instruction, reply_prompt, end_prompt
+    from core.llm import llm_executor, get_client
+    from core.router import model_router, DIFFICULTY_TIERS
+    from core.hedging import hedger, get_openrouter_client
+    from core.retrieval import relevant_text, index_stats
+    from core.documents import extract_text_from_file, extraction_cache_stats, shutdown_extraction_pool
+    from core.cache import PersistentCache
+    from core.billing import CreditLedger
+    from core.streaming import FrameBatcher
+    from core.speculative import SpeculativeResponder
+    from core.responses import ResponseManager
+    from core.prepared import PreparedResponder, answer_warmer
+    from core.utterances import UtteranceGate, utterance_classifier
+    from core.deepgram_pool import DeepgramPool, DEEPGRAM_POOL_SIZE
+    from core.whisper_pool import whisper_scheduler
+    from core.vad_service import batched_vad
+    from core.local_stt import LocalLiveTranscriber, model_load_stats, warm_up as warm_up_local_models
 
 load_dotenv()
 
-print("👀 PYTHON SEES THESE VARIABLES:", list(os.environ.keys()))
-
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
 logger = logging.getLogger("backend")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # python-docx + the styled template, off the boot path but before most /optimize calls
+    spawn_background(asyncio.to_thread(lambda: resume_doc().load_resume_template()))
+    # Opens (and creates) the extractor cache file here rather than on `import main`
+    spawn_background(asyncio.to_thread(extractor_cache.open))
+    ledger_task = asyncio.create_task(credit_ledger.run())
+    deepgram_pool_task = asyncio.create_task(deepgram_pool.run())
+    if WARM_UP_LOCAL_MODELS:
+        # In the background, so the worker takes traffic while Whisper/Silero load
+        spawn_background(asyncio.to_thread(warm_up_local_models))
+    # Supabase (~500ms), Groq (~280ms) and Deepgram (~250ms) imports would otherwise stall
+    # the event loop on the first /ws, /optimize or auth call
+    if SUPABASE_URL and SUPABASE_KEY:
+        spawn_background(asyncio.to_thread(get_supabase))
+    if os.getenv("GROQ_API_KEY"):
+        spawn_background(asyncio.to_thread(get_client))
+    spawn_background(asyncio.to_thread(lazy_import, "deepgram"))  # /ws uses its event enums with either backend
+    if hedger.enabled:
+        # The OpenAI SDK takes ~1s to import; the first hedge must not pay for it on the event loop
+        spawn_background(asyncio.to_thread(get_openrouter_client))
+    boot.log()
+    yield
+    ledger_task.cancel()
+    deepgram_pool_task.cancel()
+    await credit_ledger.flush()  # don't lose accrued usage on redeploys
+    await deepgram_pool.close()
+    shutdown_extraction_pool()
+    whisper_scheduler.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -59,15 +89,15 @@ app.add_middleware(
     expose_headers=["X-ATS-Score", "X-Missing-Keywords", "X-Items-Removed"]
 )
 
-# --- IN-MEMORY SESSION MANAGEMENT ---
-user_sessions = {}
+# --- SESSION MANAGEMENT (bounded LRU + idle TTL, optional SQLite sharing) ---
+session_store = create_session_store()
 
-def get_brain_for_user(user_id: str):
+async def get_brain_for_user(user_id: str):
     """Retrieves or creates a unique Brain instance for a specific user."""
-    if user_id not in user_sessions:
-        logger.info(f"🧠 Creating new Brain instance for user: {user_id}")
-        user_sessions[user_id] = Brain()
-    return user_sessions[user_id]
+    return await session_store.get(user_id)
+
+# Mock-interview sessions: resume + turns stay server-side between coach calls (core/coach.py)
+coach_store = create_coach_store()
 
 
 # --- API KEYS & CLIENTS SETUP ---
@@ -77,148 +107,68 @@ DEEPGRAM_API_KEY = raw_api_key.strip() if raw_api_key else None
 if not DEEPGRAM_API_KEY:
     logger.error("❌ Deepgram API Key missing! Check .env file.")
 
+# Speech-to-text for /ws: "deepgram" (hosted) or "local" (Whisper on this worker, core/local_stt.py)
+STT_BACKEND = os.getenv("STT_BACKEND", "deepgram").lower()
+# Load the local models at startup instead of on the first session (defaults to on for the local backend)
+WARM_UP_LOCAL_MODELS = os.getenv("WARM_UP_LOCAL_MODELS", "1" if STT_BACKEND == "local" else "0") == "1"
+
+# Shared Deepgram client + pre-warmed live connections (core/deepgram_pool.py)
+# Tune with DEEPGRAM_POOL_SIZE, DEEPGRAM_POOL_MAX_IDLE and DEEPGRAM_URL
+deepgram_pool = DeepgramPool(DEEPGRAM_API_KEY, size=DEEPGRAM_POOL_SIZE if STT_BACKEND == "deepgram" else 0)
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
-if SUPABASE_URL and SUPABASE_KEY:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    logger.info("🟢 Supabase Admin Client Connected")
-else:
+if not (SUPABASE_URL and SUPABASE_KEY):
     logger.error("❌ Supabase URL or Service Key missing from .env!")
 
-# STRIPE SETUP
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-
-# Initialize the AI Client for the Coach feature
+_supabase = None
+_supabase_lock = threading.Lock()
+
+def get_supabase():
+    """Supabase admin client, created once on first use (from the event loop or a worker thread)."""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                if not (SUPABASE_URL and SUPABASE_KEY):
+                    raise RuntimeError("Supabase URL or Service Key missing from .env")
+                _supabase = lazy_import("supabase").create_client(SUPABASE_URL, SUPABASE_KEY)
+                logger.info("🟢 Supabase Admin Client Connected")
+    return _supabase
+
+# All balance reads/writes go through the batched in-process ledger (core/billing.py)
+credit_ledger = CreditLedger(get_supabase)
+
+# STRIPE SETUP (only the checkout + webhook endpoints need the SDK)
+def get_stripe():
+    stripe = lazy_import("stripe")
+    stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+    return stripe
+
+def resume_doc():
+    """core.resume_doc (python-docx), imported on first use."""
+    return lazy_import("core.resume_doc")
+
+# The Coach & Optimizer share one async LLM executor (see core/llm.py)
 # Ensure GROQ_API_KEY is in your .env
-coach_llm_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Tune with LLM_MAX_CONCURRENCY and LLM_CALL_TIMEOUT
 
 
-# --- HELPER FUNCTIONS ---
-def extract_text_from_file(file_content: bytes, filename: str) -> str:
-    text = ""
-    try:
-        if filename.endswith(".pdf"):
-            reader = PdfReader(io.BytesIO(file_content))
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        elif filename.endswith(".docx"):
-            doc = Document(io.BytesIO(file_content))
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        else:
-            text = file_content.decode("utf-8")
-    except Exception as e:
-        logger.error(f"Error parsing file: {e}")
-        return "Error reading resume."
-    return text
-
-def get_difficulty_instruction(level: str):
-    if level == "Easy":
-        return "Ask standard behavioral questions (e.g., 'Tell me about yourself'). Be encouraging."
-    elif level == "Medium":
-        return "Ask standard technical questions relevant to the resume. Be professional."
-    elif level == "Hard":
-        return "Ask very difficult, deep technical questions and edge cases. Be skeptical."
-    return "Ask standard questions."
-
-def add_markdown_paragraph(doc_element, text: str, style=None):
-    """
-    Helper function to parse **bold** markdown and add it to a python-docx paragraph.
-    """
-    p = doc_element.add_paragraph(style=style)
-    # Split the text by the markdown bold syntax **
-    parts = re.split(r'(\*\*.*?\*\*)', text)
-    
-    for part in parts:
-        if part.startswith('**') and part.endswith('**'):
-            # It's bold! Remove the asterisks and add as bold run
-            clean_text = part[2:-2]
-            p.add_run(clean_text).bold = True
-        else:
-            # Normal text
-            p.add_run(part)
-    return p
-
-def create_optimized_word_doc(ai_data: dict, original_text: str) -> io.BytesIO:
-    doc = Document()
-    
-    for section in doc.sections:
-        section.top_margin, section.bottom_margin = Inches(1), Inches(1)
-        section.left_margin, section.right_margin = Inches(1), Inches(1)
-
-    # 1. Contact Info
-    name = ai_data.get("contact_info", {}).get("name", "Name Not Found")
-    contact_str = ai_data.get("contact_info", {}).get("contact_string", "Contact Info Not Found")
-    
-    header_p = doc.add_paragraph()
-    header_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    name_run = header_p.add_run(name)
-    name_run.bold = True
-    name_run.font.size = Pt(24)
-    name_run.font.color.rgb = RGBColor(31, 73, 125)
-    
-    contact = doc.add_paragraph(contact_str)
-    contact.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    line = doc.add_paragraph()
-    line.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    line.add_run("_" * 50).font.color.rgb = RGBColor(180, 180, 180)
-
-    # 2. Summary
-    if ai_data.get("summary"):
-        doc.add_heading('PROFESSIONAL PROFILE', level=1).runs[0].font.color.rgb = RGBColor(31, 73, 125)
-        add_markdown_paragraph(doc, ai_data["summary"])
-
-    # 3. Skills
-    if ai_data.get("skills"):
-        doc.add_heading('CORE COMPETENCIES & SKILLS', level=1).runs[0].font.color.rgb = RGBColor(31, 73, 125)
-        for skill in ai_data["skills"]:
-            add_markdown_paragraph(doc, skill, style='List Bullet')
-
-    # 4. Experience (The AI will no longer drop jobs here!)
-    if ai_data.get("experience"):
-        doc.add_heading('PROFESSIONAL EXPERIENCE', level=1).runs[0].font.color.rgb = RGBColor(31, 73, 125)
-        for job in ai_data["experience"]:
-            p = doc.add_paragraph()
-            if job.get("title"): p.add_run(f"{job['title']}").bold = True
-            if job.get("company"): p.add_run(f" | {job['company']}")
-            if job.get("dates"): p.add_run(f" | {job['dates']}")
-            
-            for bullet in job.get("bullets", []):
-                add_markdown_paragraph(doc, bullet, style='List Bullet')
-
-    # 5. Education & Certifications
-    if ai_data.get("certifications"):
-        doc.add_heading('CERTIFICATIONS & REQUIREMENTS', level=1).runs[0].font.color.rgb = RGBColor(31, 73, 125)
-        for cert in ai_data["certifications"]:
-            add_markdown_paragraph(doc, cert, style='List Bullet')
-
-    # 6. Tier 3 Gap Bridger
-    if ai_data.get("gap_bridger_project") and ai_data.get("gap_bridger_bullets"):
-        doc.add_heading('TECHNICAL PROJECTS & UPSKILLING', level=1).runs[0].font.color.rgb = RGBColor(31, 73, 125)
-        p = doc.add_paragraph()
-        p.add_run(f"{ai_data['gap_bridger_project']}").bold = True
-        for bullet in ai_data["gap_bridger_bullets"]:
-            add_markdown_paragraph(doc, bullet, style='List Bullet')
-
-    doc_io = io.BytesIO()
-    doc.save(doc_io)
-    doc_io.seek(0)
-    
-    return doc_io
-
 # --- DATA MODELS ---
 class CheckoutRequest(BaseModel):
     token: str
     return_url: str
 
 class CoachReply(BaseModel):
-    history: List[dict]
-    resume_text: str  
-    job_description: str
+    # With a session_id from /coach/start only user_answer is needed;
+    # the other fields are for clients that still send the whole interview
+    session_id: Optional[str] = None
+    history: List[dict] = []
+    resume_text: str = ""
+    job_description: str = ""
     user_answer: str
-    difficulty: str
+    difficulty: str = "Medium"
 
 class SyncTimeReq(BaseModel):
     user_id: str
@@ -229,20 +179,37 @@ class SyncTimeReq(BaseModel):
 #         REST ENDPOINTS (CORE & BILLING)
 # ==========================================
 
+@app.get("/metrics")
+async def metrics():
+    """Lightweight runtime counters for tuning the worker."""
+    return {
+        "llm": llm_executor.stats(),
+        "llm_router": model_router.stats(),
+        "llm_hedging": hedger.stats(),
+        "sessions": session_store.stats(),
+        "coach_sessions": coach_store.stats(),
+        "resume_index": index_stats(),
+        "extracted_text": extraction_cache_stats(),
+        "extractor_json": extractor_cache.stats(),
+        "credits": credit_ledger.stats(),
+        "deepgram_pool": deepgram_pool.stats(),
+        "whisper": whisper_scheduler.stats(),
+        "vad": batched_vad.stats(),
+        "models": model_load_stats(),
+        "prepared_answers": answer_warmer.stats(),
+        "utterance_gate": utterance_classifier.stats(),
+        "startup": {"stages_ms": {stage: round(ms, 1) for stage, ms in boot.stages.items()},
+                    "first_use_imports_ms": import_timings},
+    }
+
 @app.post("/sync-time")
 async def sync_time(req: SyncTimeReq):
     """Officially deducts minutes from the database during Coach sessions."""
     try:
-        curr_res = await asyncio.to_thread(
-            lambda: supabase.table("user_credits").select("balance_minutes").eq("user_id", req.user_id).single().execute()
-        )
-        curr_bal = curr_res.data.get("balance_minutes", 0)
+        curr_bal = await credit_ledger.get_balance(req.user_id)
         
         if curr_bal > 0:
-            new_bal = curr_bal - req.minutes_to_deduct
-            await asyncio.to_thread(
-                lambda: supabase.table("user_credits").update({"balance_minutes": new_bal}).eq("user_id", req.user_id).execute()
-            )
+            new_bal = await credit_ledger.charge(req.user_id, req.minutes_to_deduct)
             return {"status": "success", "new_balance": new_bal}
         return {"status": "insufficient_funds"}
     except Exception as e:
@@ -257,11 +224,14 @@ async def submit_context(
 ):
     """Used for the Live Copilot Context Setup"""
     try:
-        user_brain = get_brain_for_user(user_id)
+        user_brain = await get_brain_for_user(user_id)
         content = await resume.read()
-        resume_text = extract_text_from_file(content, resume.filename)
+        resume_text = await extract_text_from_file(content, resume.filename)
         
         user_brain.set_context(resume_text, job_description)
+        await session_store.save(user_id, user_brain)
+        # Answers to the common questions are generated in the background (core/prepared.py)
+        answer_warmer.start(user_id, user_brain, on_ready=lambda: spawn_background(session_store.save(user_id, user_brain)))
         logger.info(f"✅ Context updated for User {user_id}. Resume length: {len(resume_text)}")
         return {"status": "success"}
     except Exception as e:
@@ -271,7 +241,8 @@ async def submit_context(
 @app.post("/create-checkout-session")
 async def create_checkout_session(req: CheckoutRequest):
     try:
-        user_res = await asyncio.to_thread(supabase.auth.get_user, req.token)
+        stripe = get_stripe()
+        user_res = await asyncio.to_thread(lambda: get_supabase().auth.get_user(req.token))
         user_id = user_res.user.id
         user_email = user_res.user.email
 
@@ -297,6 +268,7 @@ async def stripe_webhook(request: Request):
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
     webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+    stripe = get_stripe()
 
     try:
         event = stripe.Webhook.construct_event(payload, sig_header, webhook_secret)
@@ -312,15 +284,14 @@ async def stripe_webhook(request: Request):
         if user_id:
             logger.info(f"💰 Payment success for {user_id}. Adding 60 mins.")
             try:
-                curr_res = await asyncio.to_thread(
-                    lambda: supabase.table("user_credits").select("balance_minutes").eq("user_id", user_id).single().execute()
-                )
-                curr_bal = curr_res.data.get("balance_minutes", 0)
-                new_bal = curr_bal + 60
-                await asyncio.to_thread(
-                    lambda: supabase.table("user_credits").update({"balance_minutes": new_bal}).eq("user_id", user_id).execute()
-                )
-                logger.info(f"✅ Balance updated to {new_bal}")
+                # Payments are written through immediately instead of waiting for the next flush
+                credit_ledger.credit(user_id, 60)
+                balances = await credit_ledger.flush()
+                if user_id in balances:
+                    logger.info(f"✅ Balance updated to {balances[user_id]}")
+                else:
+                    # A concurrent background flush took the delta, or this one failed and will retry
+                    logger.info(f"⏳ Top-up for {user_id} left to the background credit flush")
             except Exception as e:
                 logger.error(f"❌ Failed to update Supabase: {e}")
 
@@ -330,6 +301,59 @@ async def stripe_webhook(request: Request):
 # ==========================================
 free_tier_usage = {}
 
+# Extractor output memo: same (normalized) resume text -> same structured JSON
+EXTRACTOR_MODEL = model_router.large
+EXTRACTOR_PROMPT_VERSION = "v1"  # bump when the extractor prompt/schema changes
+extractor_cache = PersistentCache(
+    os.getenv("EXTRACTOR_CACHE_PATH", "data/extractor_cache.db"),
+    table="extractor",
+    ttl=int(os.getenv("EXTRACTOR_CACHE_TTL", str(7 * 24 * 60 * 60))),
+    max_rows=int(os.getenv("EXTRACTOR_CACHE_MAX_ROWS", "5000")),
+)
+
+def extractor_cache_key(resume_text: str) -> str:
+    normalized = " ".join(resume_text.split())
+    return hashlib.sha256(f"{EXTRACTOR_MODEL}|{EXTRACTOR_PROMPT_VERSION}|{normalized}".encode()).hexdigest()
+
+# Strong refs for fire-and-forget work (asyncio only keeps weak refs to tasks)
+background_tasks = set()
+
+def spawn_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def log_guest_usage(identifier: str):
+    """Permanently log guest metrics in Supabase (never blocks the response)."""
+    try:
+        hashed_ip = hashlib.sha256(identifier.encode()).hexdigest()
+        await asyncio.to_thread(
+            lambda: get_supabase().table("guest_usage_logs").insert({
+                "hashed_ip": hashed_ip,
+                "feature_used": "resume_optimizer_tier_1"
+            }).execute()
+        )
+    except Exception as e:
+        logger.error(f"Failed to log guest usage: {e}")
+        # We do NOT raise an error here. Let them have their resume even if logging fails.
+
+async def charge_for_optimization(user_id: str, tier: int) -> int:
+    """Checks and deducts the paid-tier cost. Returns the minutes charged (for refunds)."""
+    cost_map = {2: 25, 3: 50}
+    minutes_to_deduct = cost_map.get(tier, 25)
+
+    try:
+        charged, _ = await credit_ledger.try_debit(user_id, minutes_to_deduct)
+        if not charged:
+            raise HTTPException(status_code=402, detail=f"You need {minutes_to_deduct} minutes for this tier. Please top up.")
+        return minutes_to_deduct
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to check/deduct balance: {e}")
+        raise HTTPException(status_code=500, detail="Database error.")
+
 # ==========================================
 # ENDPOINT: OPTIMIZE RESUME
 # ==========================================
@@ -342,8 +366,14 @@ async def optimize_resume(
     resume_file: UploadFile = File(None),
     user_id: str = Form("guest") 
 ):
+    """
+    Pipeline: [billing || file extraction] -> extractor LLM -> optimizer LLM -> DOCX render.
+    Billing round trips and PDF parsing overlap; each stage is timed (Server-Timing header).
+    """
+    timer = StageTimer("optimize")
+
     # 1. Billing & Access Control Logic
-    curr_bal = 0
+    minutes_charged = 0
     now = datetime.now()
 
     if tier == 1:
@@ -364,54 +394,37 @@ async def optimize_resume(
         free_tier_usage[identifier] = now
         print(f"Free Tier 1 used by: {identifier}")
 
-        # Permanently log guest metrics in Supabase
+        # Fire-and-forget: the guest log insert is not on the critical path
         if user_id == "guest":
-            try:
-                hashed_ip = hashlib.sha256(identifier.encode()).hexdigest()
-                await asyncio.to_thread(
-                    lambda: supabase.table("guest_usage_logs").insert({
-                        "hashed_ip": hashed_ip,
-                        "feature_used": "resume_optimizer_tier_1"
-                    }).execute()
-                )
-            except Exception as e:
-                logger.error(f"Failed to log guest usage: {e}")
-                # We do NOT raise an error here. Let them have their resume even if logging fails.
+            spawn_background(log_guest_usage(identifier))
 
-    else:
+    elif user_id == "guest":
         # --- PAID TIER LOGIC (Tiers 2 & 3) ---
-        if user_id == "guest":
-            raise HTTPException(status_code=401, detail="Please log in to use advanced tiers.")
-            
-        cost_map = {2: 25, 3: 50}
-        minutes_to_deduct = cost_map.get(tier, 25)
-
+        raise HTTPException(status_code=401, detail="Please log in to use advanced tiers.")
+
+    # 2. Extract Text (runs while the paid-tier billing round trips are in flight)
+    async def extract_stage():
+        with timer.stage("extract"):
+            if resume_file:
+                content = await resume_file.read()
+                return await extract_text_from_file(content, resume_file.filename)
+            return resume_text
+
+    extract_task = asyncio.create_task(extract_stage())
+    if tier != 1:
         try:
-            curr_res = await asyncio.to_thread(
-                lambda: supabase.table("user_credits").select("balance_minutes").eq("user_id", user_id).single().execute()
-            )
-            curr_bal = curr_res.data.get("balance_minutes", 0)
-            
-            if curr_bal < minutes_to_deduct:
-                raise HTTPException(status_code=402, detail=f"You need {minutes_to_deduct} minutes for this tier. Please top up.")
-                
-            new_bal = curr_bal - minutes_to_deduct
-            await asyncio.to_thread(
-                lambda: supabase.table("user_credits").update({"balance_minutes": new_bal}).eq("user_id", user_id).execute()
-            )
-        except Exception as e:
-            logger.error(f"Failed to check/deduct balance: {e}")
-            raise HTTPException(status_code=500, detail="Database error.")
-
-    # 2. Extract Text
-    final_resume_text = resume_text
-    if resume_file:
-        content = await resume_file.read()
-        final_resume_text = extract_text_from_file(content, resume_file.filename)
+            with timer.stage("billing"):
+                minutes_charged = await charge_for_optimization(user_id, tier)
+        except HTTPException:
+            extract_task.cancel()
+            raise
+    final_resume_text = await extract_task
 
     # ==========================================
     # STEP 1: THE EXTRACTOR (Data Fidelity Only)
     # ==========================================
+    # Not filtered by the JD: the extractor must see the header, education and every job, in order
+    extractor_resume_text = final_resume_text[:4000]
     extractor_prompt = f"""
     You are an expert data extraction algorithm. 
     Your ONLY job is to convert the following raw resume text into a perfectly structured JSON object.
@@ -422,7 +435,7 @@ async def optimize_resume(
     3. If there are multiple jobs, you MUST create an object for each one in the `experience` array. Do NOT combine them.
     
     RAW RESUME TEXT:
-    {final_resume_text[:4000]}
+    {extractor_resume_text}
     
     Return ONLY a valid JSON object matching this schema:
     {{
@@ -441,21 +454,31 @@ async def optimize_resume(
     }}
     """
 
+    # The extractor only depends on the resume text (temperature 0), so reuse earlier runs across JDs
+    extractor_key = extractor_cache_key(final_resume_text)
+    extracted_data = await extractor_cache.get(extractor_key)
     try:
-        extractor_response = coach_llm_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "system", "content": extractor_prompt}],
-            temperature=0.0, 
-            response_format={"type": "json_object"}
-        )
-        extracted_data = json.loads(extractor_response.choices[0].message.content)
+        if extracted_data is None:
+            with timer.stage("extractor_llm"):
+                extractor_response = await model_router.create(
+                    "extract",
+                    [{"role": "system", "content": extractor_prompt}],
+                    temperature=0.0, 
+                    response_format={"type": "json_object"}
+                )
+            extracted_data = json.loads(extractor_response.choices[0].message.content)
+            # Only cache the large model's extraction, not a fallback's
+            if getattr(extractor_response, "model", EXTRACTOR_MODEL) == EXTRACTOR_MODEL:
+                await extractor_cache.set(extractor_key, extracted_data)
+        else:
+            logger.info("⚡ Extractor cache hit, skipping STEP 1 LLM call")
         print(f"\n[STEP 1] Jobs Extracted: {len(extracted_data.get('experience', []))}\n")
         
     except Exception as e:
         logger.error(f"Extractor failed: {e}")
         # SECURE REFUND: Only refund if it's a paid tier and NOT a guest!
         if user_id != "guest" and tier > 1:
-            await asyncio.to_thread(lambda: supabase.table("user_credits").update({"balance_minutes": curr_bal}).eq("user_id", user_id).execute())
+            credit_ledger.credit(user_id, minutes_charged)
         raise HTTPException(status_code=500, detail="Failed to parse resume.")
 
     # ==========================================
@@ -475,7 +498,7 @@ async def optimize_resume(
     Your job is to optimize this JSON structure based on the Job Description provided.
 
     Job Description:
-    {job_description[:3000]}
+    {relevant_text(job_description, final_resume_text, 3000)}
 
     Extracted Resume JSON:
     {json.dumps(extracted_data)}
@@ -511,12 +534,13 @@ async def optimize_resume(
     """
 
     try:
-        optimizer_response = coach_llm_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "system", "content": optimizer_prompt}],
-            temperature=0.3,
-            response_format={"type": "json_object"}
-        )
+        with timer.stage("optimizer_llm"):
+            optimizer_response = await model_router.create(
+                "optimize",
+                [{"role": "system", "content": optimizer_prompt}],
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
         final_ai_data = json.loads(optimizer_response.choices[0].message.content)
         print(f"\n[STEP 2] Jobs Optimized: {len(final_ai_data.get('experience', []))}\n")
 
@@ -524,11 +548,13 @@ async def optimize_resume(
         logger.error(f"Optimizer failed: {e}")
         # SECURE REFUND: Only refund if it's a paid tier and NOT a guest!
         if user_id != "guest" and tier > 1:
-            await asyncio.to_thread(lambda: supabase.table("user_credits").update({"balance_minutes": curr_bal}).eq("user_id", user_id).execute())
+            credit_ledger.credit(user_id, minutes_charged)
         raise HTTPException(status_code=500, detail="AI Generation failed.")
 
-    # 3. Generate the Word Document
-    doc_io = create_optimized_word_doc(final_ai_data, final_resume_text)
+    # 3. Generate the Word Document (CPU-bound, keep it off the event loop)
+    with timer.stage("render"):
+        doc_io = await asyncio.to_thread(resume_doc().create_optimized_word_doc, final_ai_data, final_resume_text)
+    timer.log()
 
     # 4. Return the file and headers
     headers = {
@@ -536,10 +562,12 @@ async def optimize_resume(
         'X-ATS-Score': str(final_ai_data.get("ats_match_score", 0)),
         'X-Missing-Keywords': json.dumps(final_ai_data.get("missing_keywords", [])),
         'X-Items-Removed': json.dumps(final_ai_data.get("items_removed_for_optimization", [])),
-        'Access-Control-Expose-Headers': 'X-ATS-Score, X-Missing-Keywords, X-Items-Removed' 
+        'Access-Control-Expose-Headers': 'X-ATS-Score, X-Missing-Keywords, X-Items-Removed',
+        'Server-Timing': timer.server_timing(),
     }
 
-    return StreamingResponse(doc_io, media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", headers=headers)
+    # One contiguous body straight from the render buffer (no copy, no line-by-line iteration)
+    return Response(content=doc_io.getbuffer(), media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document", headers=headers)
 
 # ==========================================
 #         AI COACH ENDPOINTS
@@ -560,7 +588,7 @@ async def start_coaching(
         print(f"Received file: {resume_file.filename}")
         try:
             content = await resume_file.read()
-            final_resume_text = extract_text_from_file(content, resume_file.filename)
+            final_resume_text = await extract_text_from_file(content, resume_file.filename)
             print(f"Successfully extracted {len(final_resume_text)} characters from file.")
         except Exception as e:
             logger.error(f"File extraction failed: {str(e)}")
@@ -577,25 +605,29 @@ async def start_coaching(
     Difficulty Level: {difficulty}
     {diff_instruction}
     
-    User Resume: {final_resume_text[:2000]}
-    Job Description: {job_description[:2000]}
+    User Resume: {relevant_text(final_resume_text, job_description, 2000)}
+    Job Description: {relevant_text(job_description, final_resume_text, 2000)}
     
     Start the interview. Output JUST the opening question.
     """
     
     print("Calling Groq API...")
     try:
-        response = coach_llm_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "system", "content": prompt}],
+        response = await model_router.create(
+            "coach_start",
+            [{"role": "system", "content": prompt}],
+            tier=DIFFICULTY_TIERS.get(difficulty),
             temperature=0.7,
             max_tokens=200
         )
         print("Groq API returned successfully.")
-        
+        question = response.choices[0].message.content
+        session = await coach_store.create(user_id, final_resume_text, job_description, difficulty, question)
+
         return {
-            "message": response.choices[0].message.content,
-            "extracted_resume": final_resume_text 
+            "message": question,
+            "extracted_resume": final_resume_text,
+            "session_id": session.session_id,
         }
     except Exception as e:
         logger.error(f"Groq API Error: {str(e)}")
@@ -603,83 +635,74 @@ async def start_coaching(
         from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=f"AI Error: {str(e)}")
 
+async def get_coach_session(data: CoachReply):
+    """Server-side session for this call, None for clients that send the whole history."""
+    if not data.session_id:
+        return None
+    session = await coach_store.get(data.session_id)
+    if session is None and not data.history:
+        raise HTTPException(status_code=404, detail="Coach session expired. Please start a new interview.")
+    return session
+
 @app.post("/coach/reply")
 async def reply_coaching(data: CoachReply):
-    diff_instruction = get_difficulty_instruction(data.difficulty)
-
-    # UPDATED: We explicitly demand a JSON structure.
-    messages = [
-        {"role": "system", "content": f"""
-        You are a strict but helpful Interview Coach.
-        Difficulty Level: {data.difficulty}
-        {diff_instruction}
-        
-        Job Description: {data.job_description[:500]}
-        Resume: {data.resume_text[:1000]}
-        
-        The user just answered your question.
-        1. Analyze their answer against their resume.
-        2. Give a short rating (Poor/Good/Excellent).
-        3. Provide 1 sentence of specific feedback.
-        4. Ask the NEXT question based on the difficulty level.
-        
-        CRITICAL: You MUST respond ONLY with a valid JSON object in the exact format below. Do not include markdown code blocks, just raw JSON.
-        {{
-            "rating": "[Poor/Good/Excellent]",
-            "feedback": "Your 1 sentence feedback here.",
-            "next_question": "Your next question here."
-        }}
-        """}
-    ]
-    
-    for msg in data.history:
-        messages.append(msg)
-    
-    messages.append({"role": "user", "content": data.user_answer})
-
-    response = coach_llm_client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=messages,
+    session = await get_coach_session(data)
+    if session is not None:
+        # Bounded prompt: summary of older turns + the latest ones, no resent history
+        messages = session.build_reply_messages(data.user_answer)
+        difficulty = session.difficulty
+    else:
+        # Pick the resume/JD sections that matter for the current question + answer
+        last_question = next((m["content"] for m in reversed(data.history) if m.get("role") == "assistant"), "")
+        focus = f"{last_question} {data.user_answer}"
+        messages = [{"role": "system", "content": reply_prompt(
+            data.difficulty,
+            relevant_text(data.job_description, focus, 500),
+            relevant_text(data.resume_text, focus, 1000),
+        )}]
+        for msg in data.history:
+            messages.append(msg)
+        messages.append({"role": "user", "content": data.user_answer})
+        difficulty = data.difficulty
+    coach_store.record_prompt(messages)
+
+    response = await model_router.create(
+        "coach_reply",
+        messages,
+        tier=DIFFICULTY_TIERS.get(difficulty),
         temperature=0.7,
         max_tokens=500,
         response_format={"type": "json_object"} # FORCING JSON OUTPUT (Groq supports this)
     )
-    
-    return {"message": response.choices[0].message.content}
+    content = response.choices[0].message.content
+
+    if session is not None:
+        session.record_reply(data.user_answer, content)
+        await coach_store.save(session)
+    return {"message": content}
 
 @app.post("/coach/end")
 async def end_coaching(data: CoachReply):
-    messages = [
-        {"role": "system", "content": f"""
-        You are a strict but helpful Interview Coach. The interview is now OVER.
-        Generate a final Scorecard based on the candidate's answers.
-        Resume Context: {data.resume_text[:500]}
-        
-        CRITICAL: You MUST respond ONLY with a valid JSON object in the exact format below. 
-        Do not ask any more questions. Do not include markdown code blocks.
-        {{
-            "overall_score": 75,
-            "summary": "A 2-sentence overall summary of their performance highlighting their main strength.",
-            "areas_of_improvement": [
-                "First specific actionable bullet point.",
-                "Second specific actionable bullet point.",
-                "Third specific actionable bullet point."
-            ]
-        }}
-        """}
-    ]
-    
-    # Append the history so it knows what to grade
-    for msg in data.history:
-        messages.append(msg)
-
-    response = coach_llm_client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=messages,
+    session = await get_coach_session(data)
+    if session is not None:
+        # Every turn with its rating, answers capped, instead of the raw chat
+        messages = session.build_end_messages(data.user_answer)
+    else:
+        transcript = " ".join(str(m.get("content", "")) for m in data.history)
+        messages = [{"role": "system", "content": end_prompt(relevant_text(data.resume_text, transcript, 500))}]
+        # Append the history so it knows what to grade
+        for msg in data.history:
+            messages.append(msg)
+
+    response = await model_router.create(
+        "coach_end",
+        messages,
         temperature=0.7,
         max_tokens=600,
         response_format={"type": "json_object"} # Force strict JSON
     )
+    if session is not None:
+        await coach_store.end(session)
     return {"message": response.choices[0].message.content}
 
 
@@ -699,18 +722,16 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
 
     loop = asyncio.get_event_loop()
     countdown_task = None
-    dg_connection = None
+    stt_connection = None
 
     try:
-        user_res = await asyncio.to_thread(supabase.auth.get_user, token)
+        user_res = await asyncio.to_thread(lambda: get_supabase().auth.get_user(token))
         user_id = user_res.user.id
 
-        current_brain = get_brain_for_user(user_id)
+        current_brain = await get_brain_for_user(user_id)
 
-        credit_res = await asyncio.to_thread(
-            lambda: supabase.table("user_credits").select("balance_minutes").eq("user_id", user_id).single().execute()
-        )
-        balance = credit_res.data.get("balance_minutes", 0)
+        # Fresh read on connect (payments may have landed on another worker)
+        balance = await credit_ledger.get_balance(user_id, refresh=True)
 
         if balance <= 0:
             logger.info(f"User {user_id} has 0 credits.")
@@ -726,6 +747,8 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
         return
 
     # --- THE BULLETPROOF BILLING LOOP ---
+    # Minutes are accrued in the shared ledger and flushed in batches; the socket
+    # is updated from the local view, so there is no DB round trip per minute.
     countdown_active = True
     async def credit_countdown():
         while countdown_active:
@@ -737,16 +760,10 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
             if not countdown_active: break
             
             try:
-                curr_res = await asyncio.to_thread(
-                    lambda: supabase.table("user_credits").select("balance_minutes").eq("user_id", user_id).single().execute()
-                )
-                curr_bal = curr_res.data.get("balance_minutes", 0)
+                curr_bal = await credit_ledger.get_balance(user_id)
 
                 if curr_bal > 0:
-                    new_bal = curr_bal - 1
-                    await asyncio.to_thread(
-                        lambda: supabase.table("user_credits").update({"balance_minutes": new_bal}).eq("user_id", user_id).execute()
-                    )
+                    new_bal = await credit_ledger.charge(user_id, 1)
                     
                     try:
                         await websocket.send_json({"event": "credit_update", "balance": new_bal})
@@ -759,46 +776,120 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
                         logger.warning(f"Socket closed for {user_id}. Terminating ghost billing loop.")
                         break
             except Exception as e:
-                logger.error(f"⚠️ Countdown DB error: {e}")
+                logger.error(f"⚠️ Countdown billing error: {e}")
 
-    # --- DEEPGRAM SETUP ---
+    # --- SPEECH-TO-TEXT SETUP ---
+    # Both backends hand back a started connection; handlers are attached below
     try:
-        config = DeepgramClientOptions(url="api.deepgram.com", verbose=logging.WARNING)
-        deepgram = DeepgramClient(DEEPGRAM_API_KEY, config)
-        dg_connection = deepgram.listen.live.v("1")
+        if STT_BACKEND == "local":
+            stt_connection = await asyncio.to_thread(LocalLiveTranscriber)
+        else:
+            stt_connection = await deepgram_pool.acquire()
     except Exception as e:
-        logger.error(f"Deepgram Init Failed: {e}")
+        logger.error(f"Failed to start speech-to-text ({STT_BACKEND}): {e}")
         await websocket.close()
         return
 
     transcript_buffer = [] 
+    # Single ordered writer for transcript + AI events; coalesces ai_chunk tokens
+    outbox = FrameBatcher(websocket)
+    # Small or large model per question, with fallback (core/router.py)
+    def generate(text):
+        return model_router.stream(current_brain.build_messages(text), question=text)
+
+    def speculate(text):
+        # Prompt stats are recorded only if the speculation is committed
+        messages = current_brain.build_messages(text, record=False)
+        return messages, model_router.stream(messages, question=text)
+    # Filler and chit-chat never reach the LLM (core/utterances.py)
+    gate = UtteranceGate()
+    # Answers to common questions pre-generated at /submit-context
+    prepared = PreparedResponder(user_id, current_brain)
     
     async def trigger_ai_response(text):
         if len(text.strip()) < 2: return
         try:
-            await websocket.send_json({"event": "ai_start"})
+            await outbox.send_event({"event": "ai_start"})
         except RuntimeError:
+            speculator.cancel()
             return 
             
-        system_prompt = current_brain.build_system_prompt()
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(current_brain.history)
-        messages.append({"role": "user", "content": text})
-
-        full_answer = ""
+        speculation = None
+        answer_stream = prepared.take(text)
+        if answer_stream is not None:
+            speculator.cancel()  # the prepared answer replaces any speculative one
+            logger.info(f"⚡ Serving prepared answer for {user_id}")
+        else:
+            speculation = speculator.take(text)
+            if speculation is not None:
+                logger.info(f"🔮 Committing speculative answer for {user_id}")
+                current_brain.record_prompt(speculation.prompt)
+                answer_stream = speculation.stream()
+            else:
+                answer_stream = generate(text)
+            logger.info(f"🧮 Prompt tokens for {user_id}: ~{current_brain.last_prompt_tokens}")
+
+        answer_parts = []
         try:
-            async for chunk in stream_completion(messages):
-                full_answer += chunk
-                await websocket.send_json({"event": "ai_chunk", "text": chunk})
+            async for chunk in answer_stream:
+                answer_parts.append(chunk)
+                await outbox.add_chunk(chunk)
             
-            current_brain.add_interaction(text, full_answer)
-            await websocket.send_json({"event": "ai_done"})
+            current_brain.add_interaction(text, "".join(answer_parts))
+            spawn_background(session_store.save(user_id, current_brain))  # SQLite write off the answer path
+            await outbox.send_event({"event": "ai_done", "prompt_tokens": current_brain.last_prompt_tokens})
+        except asyncio.CancelledError:
+            # Superseded by a newer question: close the bubble, don't record a half answer
+            try:
+                await outbox.send_event({"event": "ai_done", "interrupted": True})
+            except RuntimeError:
+                pass
+            raise
         except Exception as e:
             logger.error(f"AI Error: {e}")
             try:
-                await websocket.send_json({"event": "ai_done"})
+                await outbox.send_event({"event": "ai_done"})
             except:
                 pass
+        finally:
+            # Release the provider stream right away (matters when we were cancelled)
+            await answer_stream.aclose()
+            if speculation is not None:
+                speculation.cancel()
+
+    async def send_template_reply(reply):
+        """Chit-chat answered locally, in the same ai_start / ai_chunk / ai_done shape."""
+        try:
+            await outbox.send_event({"event": "ai_start"})
+            await outbox.add_chunk(reply)
+            await outbox.send_event({"event": "ai_done", "template": True})
+        except asyncio.CancelledError:
+            try:
+                await outbox.send_event({"event": "ai_done", "interrupted": True})
+            except RuntimeError:
+                pass
+            raise
+        except RuntimeError:
+            pass
+
+    # One active generation per session: supersedes, merges follow-ups, caps per-user streams
+    responses = ResponseManager(user_id, trigger_ai_response)
+    # Starts answering on stable interim transcripts the gate would answer; committed if the final text matches.
+    # Speculative streams take the same per-user slots as answers.
+    speculator = SpeculativeResponder(speculate, should_answer=gate.would_answer, slots=responses.slots)
+
+    def submit_utterance(text):
+        """Runs on the event loop for every finished utterance."""
+        verdict = gate.check(text)
+        if verdict.action == "answer":
+            speculator.hand_over()
+            responses.submit(text)
+            return
+        speculator.drop(text)
+        # Filler must not cancel an answer that is still streaming; chit-chat only gets a reply when idle
+        if verdict.action == "reply" and not responses.busy:
+            speculator.hand_over()
+            responses.submit(text, respond=lambda _: send_template_reply(verdict.reply))
 
     def on_message(self, result, **kwargs):
         sentence = result.channel.alternatives[0].transcript
@@ -806,41 +897,31 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
             is_final = result.is_final
             try:
                 asyncio.run_coroutine_threadsafe(
-                    websocket.send_json({"event": "transcript", "text": sentence, "is_final": is_final}), loop
+                    outbox.send_event({"event": "transcript", "text": sentence, "is_final": is_final}), loop
                 )
             except RuntimeError:
                 pass 
                 
+            if not is_final:
+                loop.call_soon_threadsafe(speculator.on_interim, " ".join(transcript_buffer + [sentence]))
+
             if is_final:
                 transcript_buffer.append(sentence)
                 if sentence.strip().endswith("?"):
                     full_text = " ".join(transcript_buffer)
                     transcript_buffer.clear()
-                    asyncio.run_coroutine_threadsafe(trigger_ai_response(full_text), loop)
+                    loop.call_soon_threadsafe(submit_utterance, full_text)
 
     def on_utterance_end(self, utterance_end, **kwargs):
         if len(transcript_buffer) > 0:
             full_text = " ".join(transcript_buffer)
             if len(full_text.split()) >= 2:
                 transcript_buffer.clear()
-                asyncio.run_coroutine_threadsafe(trigger_ai_response(full_text), loop)
+                loop.call_soon_threadsafe(submit_utterance, full_text)
 
-    dg_connection.on(LiveTranscriptionEvents.Transcript, on_message)
-    dg_connection.on(LiveTranscriptionEvents.UtteranceEnd, on_utterance_end)
-    
-    options = LiveOptions(
-        model="nova-2", 
-        language="en-US", 
-        smart_format=True, 
-        interim_results=True, 
-        utterance_end_ms="1000", 
-        
-    )
-    
-    if dg_connection.start(options) is False:
-        logger.error("Failed to connect to Deepgram")
-        await websocket.close()
-        return
+    events = lazy_import("deepgram").LiveTranscriptionEvents
+    stt_connection.on(events.Transcript, on_message)
+    stt_connection.on(events.UtteranceEnd, on_utterance_end)
 
     # --- THE MAIN EVENT LOOP ---
     try:
@@ -860,7 +941,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
                     billing_started = True
                     logger.info(f"🎙️ Audio received. Billing started for {user_id}.")
                     
-                dg_connection.send(message.get("bytes"))
+                stt_connection.send(message.get("bytes"))
                 
            # 2. Handle Text Commands Safely
             elif message.get("text"):
@@ -870,7 +951,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
                     # 🛑 IF WE RECEIVE A KEEP-ALIVE PING, FORWARD THE RAW TEXT TO DEEPGRAM
                     if msg.get("type") == "KeepAlive":
                         # This is the manual way to keep-alive in SDK v3.1.0
-                        dg_connection.send('{"type": "KeepAlive"}')
+                        stt_connection.send('{"type": "KeepAlive"}')
                         logger.info(f"KeepAlive ping sent to Deepgram for user {user_id}")
                         
                     elif msg.get("text") == "stop": 
@@ -887,5 +968,12 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
         countdown_active = False 
         if countdown_task:
             countdown_task.cancel()
-        if dg_connection:
-            dg_connection.finish()
\ No newline at end of file
+        responses.cancel()
+        speculator.cancel()
+        logger.info(f"💬 Response stats for {user_id}: {responses.stats()}")
+        logger.info(f"🔮 Speculation stats for {user_id}: {speculator.stats()}")
+        logger.info(f"⚡ Prepared answer stats for {user_id}: {prepared.stats()}")
+        logger.info(f"🚦 Utterance gate stats for {user_id}: {gate.stats()}")
+        credit_ledger.forget(user_id)  # re-read on the next connect anyway
+        await outbox.close()
+        await deepgram_pool.release(stt_connection)  # finish() off the event loop, for either backend
\ No newline at end of file
@@ -1,61 +1,162 @@
+import os
+import time
+import logging
+import threading
 import torch
 import numpy as np
-import sounddevice as sd
-import time
 
-# Load pre-trained VAD model (downloads automatically once)
-model, utils = torch.hub.load(repo_or_dir='snakers4/silero-vad',
-                              model='silero_vad',
-                              force_reload=False)
-(get_speech_timestamps, _, read_audio, VADIterator, collect_chunks) = utils
+logger = logging.getLogger("stt-backend")
+
+FRAME_SAMPLES = 512           # Silero VAD step at 16 kHz
+CONTEXT_SAMPLES = 64          # Silero v5 prepends the tail of the previous frame
+MAX_UTTERANCE_SECONDS = 30    # One Whisper window; longer speech is cut here
+
+# Pinned local copy of the VAD (see download_models.py); no network at runtime
+MODELS_DIR = os.getenv("MODELS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+SILERO_VAD_PATH = os.getenv("SILERO_VAD_PATH", os.path.join(MODELS_DIR, "silero_vad.jit"))
+SILERO_VAD_VERSION = "v5.1.2"  # torch.hub fallback only
+
+_model = None
+_model_lock = threading.Lock()
+load_info = {"loaded": False}
+
+
+def get_vad_model():
+    """Silero VAD, loaded on first use: pinned file, then the silero-vad package, then torch.hub."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                started = time.perf_counter()
+                if os.path.exists(SILERO_VAD_PATH):
+                    model, source = torch.jit.load(SILERO_VAD_PATH, map_location="cpu"), SILERO_VAD_PATH
+                else:
+                    try:
+                        from silero_vad import load_silero_vad
+                        model, source = load_silero_vad(), "silero-vad package"
+                    except ImportError:
+                        model, _ = torch.hub.load(repo_or_dir=f"snakers4/silero-vad:{SILERO_VAD_VERSION}",
+                                                  model="silero_vad", trust_repo=True)
+                        source = f"torch.hub {SILERO_VAD_VERSION}"
+                model.eval()
+                load_ms = (time.perf_counter() - started) * 1000
+                load_info.update(loaded=True, load_ms=round(load_ms, 1), source=source)
+                logger.info(f"⏱️ Silero VAD loaded in {load_ms:.0f}ms from {source}")
+                _model = model
+    return _model
 
 class SmartAudioBuffer:
-    def __init__(self, sample_rate=16000):
+    """
+    Collects speech frames into a preallocated two-slot ring and returns each
+    finished utterance as a zero-copy view.
+
+    Each utterance is written contiguously into the slot the previous one did
+    not use, so a returned view stays valid until the *next* utterance has been
+    completed. Callers that keep it longer must copy it.
+
+    Pauses are measured in samples, not wall-clock time, so replaying recorded
+    audio faster than real time gives the same utterances.
+    """
+    def __init__(self, sample_rate=16000, max_utterance_seconds=MAX_UTTERANCE_SECONDS):
         self.sample_rate = sample_rate
-        self.vad_iterator = VADIterator(model)
-        self.buffer = []
-        self.speaking = False
-        self.silence_start = None
+        # The 16 kHz network with the recurrent state passed explicitly: the loaded
+        # model keeps one state internally, shared by every buffer in the process
+        self.model = get_vad_model()._model
         self.SPEECH_CONFIDENCE = 0.5
         self.PAUSE_THRESHOLD = 1.5 # Seconds of silence before we assume sentence ended
 
+        self.max_samples = int(max_utterance_seconds * sample_rate)
+        self._ring = np.zeros(2 * self.max_samples, dtype=np.float32)
+        # Reused for every VAD call: the tensor shares memory with this scratch input (context + frame)
+        self._input = np.zeros(CONTEXT_SAMPLES + FRAME_SAMPLES, dtype=np.float32)
+        self._input_tensor = torch.from_numpy(self._input).unsqueeze(0)
+        self._state = torch.zeros(2, 1, 128)
+
+        self._slot = 1    # ring half holding the current utterance
+        self._start = 0   # first sample of the current utterance in the ring
+        self._end = 0     # one past its last sample
+        self.speaking = False
+        self.voiced = False  # the current segment holds speech, not only trailing silence
+        self.silence_samples = 0
+        self.pause_samples = int(self.PAUSE_THRESHOLD * sample_rate)
+
+    def speech_probability(self, audio_frame: np.ndarray) -> float:
+        self._input[CONTEXT_SAMPLES:] = audio_frame
+        with torch.inference_mode():
+            prob, self._state = self.model(self._input_tensor, self._state)
+        self._input[:CONTEXT_SAMPLES] = self._input[-CONTEXT_SAMPLES:]
+        return prob.item()
+
     def process_frame(self, audio_frame: np.ndarray):
         """
-        Returns: None (still listening), or bytes (complete sentence audio)
+        Returns: None (still listening), or np.ndarray (complete sentence audio, a view into the ring)
         """
-        # Convert numpy frame to torch tensor
-        tensor = torch.from_numpy(audio_frame)
-        
-        # Get speech probability
-        speech_prob = model(tensor, self.sample_rate).item()
-        
+        return self.accept(audio_frame, self.speech_probability(audio_frame))
+
+    def accept(self, audio_frame: np.ndarray, speech_prob: float):
+        """Same as process_frame, for a frame whose speech probability is already known."""
         if speech_prob > self.SPEECH_CONFIDENCE:
             # SPEECH DETECTED
+            if not self.speaking:
+                self._begin_utterance()
             self.speaking = True
-            self.silence_start = None
-            self.buffer.append(audio_frame)
-            return None
-            
+            self.voiced = True
+            self.silence_samples = 0
+            return self._write(audio_frame)
+
         elif self.speaking:
-            # WE WERE SPEAKING, NOW IT IS QUIET
-            if self.silence_start is None:
-                self.silence_start = time.time()
-                self.buffer.append(audio_frame) # Keep a bit of the silence for naturalness
-            else:
-                # Check how long it has been silent
-                if time.time() - self.silence_start > self.PAUSE_THRESHOLD:
-                    # SENTENCE COMPLETE!
-                    full_audio = np.concatenate(self.buffer)
-                    self.reset()
-                    return full_audio
-                else:
-                    self.buffer.append(audio_frame)
-            return None
-            
+            # WE WERE SPEAKING, NOW IT IS QUIET (keep the silence for naturalness)
+            self.silence_samples += len(audio_frame)
+            if self.silence_samples > self.pause_samples:
+                # SENTENCE COMPLETE!
+                return self._complete()
+            return self._write(audio_frame)
+
         return None
 
+    def _begin_utterance(self):
+        self._slot ^= 1
+        self._start = self._end = self._slot * self.max_samples
+
+    def _write(self, audio_frame):
+        n = min(len(audio_frame), self._start + self.max_samples - self._end)
+        self._ring[self._end:self._end + n] = audio_frame[:n]
+        self._end += n
+        if self._end - self._start < self.max_samples:
+            return None
+
+        # Hit the length cap: hand it over and carry on in the other slot.
+        # The pause counter carries over, or a cap shorter than the pause would never end the utterance.
+        silence = self.silence_samples
+        utterance = self._complete()
+        if n < len(audio_frame):
+            self._begin_utterance()
+            self.speaking = True
+            self.voiced = silence == 0  # the rest of a speech frame, or more of the pause
+            self.silence_samples = silence
+            self._write(audio_frame[n:])
+        return utterance
+
+    def _complete(self):
+        utterance = self._ring[self._start:self._end]
+        voiced = self.voiced
+        self.speaking = False
+        self.voiced = False
+        self.silence_samples = 0
+        self._start = self._end
+        # A segment of nothing but trailing silence (split off at the cap) isn't an utterance
+        return utterance if len(utterance) and voiced else None
+
+    def flush(self):
+        """Returns buffered speech (e.g. the stream ended mid-sentence) or None, and resets."""
+        audio = self._complete() if self.speaking else None
+        self.reset()
+        return audio
+
     def reset(self):
-        self.buffer = []
+        self._start = self._end
         self.speaking = False
-        self.silence_start = None
-        self.vad_iterator.reset_states()
\ No newline at end of file
+        self.voiced = False
+        self.silence_samples = 0
+        self._input[:] = 0
+        self._state = torch.zeros(2, 1, 128)
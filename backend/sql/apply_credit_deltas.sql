@@ -0,0 +1,26 @@
+-- Batched credit ledger flush used by core/billing.py (CreditLedger.flush).
+-- Applies many per-user minute deltas in one round trip, atomically per row,
+-- and returns the resulting balances so workers can refresh their local view.
+--
+-- deltas: [{"user_id": "<uuid>", "delta": -3}, {"user_id": "<uuid>", "delta": 60}, ...]
+create or replace function apply_credit_deltas(deltas jsonb)
+returns table (user_id uuid, balance_minutes integer)
+language sql
+security definer
+set search_path = public
+as $$
+    update user_credits as uc
+    set balance_minutes = greatest(uc.balance_minutes + d.delta, 0)
+    from (
+        select (item->>'user_id')::uuid as user_id, sum((item->>'delta')::integer) as delta
+        from jsonb_array_elements(deltas) as item
+        group by 1
+    ) as d
+    where uc.user_id = d.user_id
+    returning uc.user_id, uc.balance_minutes;
+$$;
+
+-- Runs as the owner, so only the backend (service role key) may call it;
+-- otherwise anyone with the anon key could credit themselves through /rpc
+revoke execute on function apply_credit_deltas(jsonb) from public, anon, authenticated;
+grant execute on function apply_credit_deltas(jsonb) to service_role;
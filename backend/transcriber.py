@@ -1,31 +1,124 @@
 # interviewhelp/backend/transcriber.py
-from faster_whisper import WhisperModel
+import os
+import time
+import threading
 import numpy as np
-import tempfile
-import soundfile as sf
 import logging
 
 logger = logging.getLogger("stt-backend")
 
-model = WhisperModel(
-    "base",
-    device="cpu",       # auto-safe (no GPU crashes)
-    compute_type="int8" # fast + stable
-)
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")              # auto-safe (no GPU crashes)
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # fast + stable
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))    # 0 = CTranslate2 default (4)
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "en")              # live sessions are en-US, like Deepgram's
+# Pinned local copies (see download_models.py); the Hub is only a fallback
+MODELS_DIR = os.getenv("MODELS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+WHISPER_MODEL_PATH = os.getenv("WHISPER_MODEL_PATH", os.path.join(MODELS_DIR, f"faster-whisper-{WHISPER_MODEL}"))
+# Hub commit to pin when downloading; the default model is pinned, others take the latest unless set
+WHISPER_MODEL_REVISIONS = {"base": "ebe41f70d5b6dfa9166e2c581c45c9c0cfc57b66"}  # Systran/faster-whisper-base
+WHISPER_MODEL_REVISION = os.getenv("WHISPER_MODEL_REVISION", WHISPER_MODEL_REVISIONS.get(WHISPER_MODEL))
+SAMPLE_RATE = 16000  # what Whisper expects
+MAX_BATCH_SECONDS = 30  # one encoder window; longer utterances are transcribed on their own
+NO_SPEECH_THRESHOLD = 0.6
 
-def transcribe_audio(audio: np.ndarray, sample_rate: int = 16000) -> str:
-    if len(audio) == 0:
-        return ""
+_model = None
+_model_lock = threading.Lock()
+load_info = {"loaded": False}
+
+
+def get_model(cpu_threads: int = WHISPER_CPU_THREADS, num_workers: int = 1):
+    """One WhisperModel per process, loaded on first use (thread settings apply to that first load)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                started = time.perf_counter()
+                from faster_whisper import WhisperModel
+                if os.path.isdir(WHISPER_MODEL_PATH):
+                    source, kwargs = WHISPER_MODEL_PATH, {}
+                else:
+                    source, kwargs = WHISPER_MODEL, {"download_root": MODELS_DIR, "revision": WHISPER_MODEL_REVISION}
+                model = WhisperModel(source, device=WHISPER_DEVICE, compute_type=WHISPER_COMPUTE_TYPE,
+                                     cpu_threads=cpu_threads, num_workers=num_workers, **kwargs)
+                load_ms = (time.perf_counter() - started) * 1000
+                load_info.update(loaded=True, load_ms=round(load_ms, 1), source=source, pid=os.getpid())
+                logger.info(f"⏱️ Whisper '{WHISPER_MODEL}' loaded in {load_ms:.0f}ms from {source}")
+                _model = model
+    return _model
+
+
+def _as_whisper_input(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    # Whisper decodes straight from a mono float32 array at 16 kHz, no file round trip
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    if sample_rate != SAMPLE_RATE:
+        target = np.arange(0, len(audio), sample_rate / SAMPLE_RATE)
+        audio = np.interp(target, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
 
-    with tempfile.NamedTemporaryFile(suffix=".wav") as f:
-        sf.write(f.name, audio, sample_rate)
 
-        segments, _ = model.transcribe(
-            f.name,
-            vad_filter=True,
-        )
+def stream_segments(audio: np.ndarray, sample_rate: int = SAMPLE_RATE):
+    """
+    Yields segment texts as Whisper decodes them, so callers can forward partial
+    text while the rest of the utterance is still being transcribed.
+    """
+    if len(audio) == 0:
+        return
+    segments, _ = get_model().transcribe(
+        _as_whisper_input(audio, sample_rate),
+        vad_filter=True,
+    )
+    for seg in segments:  # lazy: each segment is decoded on iteration
+        text = seg.text.strip()
+        if text:
+            yield text
 
-        text = " ".join(seg.text.strip() for seg in segments)
 
+def transcribe_audio(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> str:
+    text = " ".join(stream_segments(audio, sample_rate))
     logger.info(f"📝 Transcript: {text}")
     return text
+
+
+def transcribe_batch(audios, sample_rate: int = SAMPLE_RATE):
+    """
+    Transcribes several utterances (e.g. from different sessions) with one encoder
+    pass and one batched greedy decode. Utterances longer than one 30 s window
+    fall back to the regular per-utterance path.
+    """
+    from faster_whisper.audio import pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+    from faster_whisper.transcribe import get_ctranslate2_storage
+
+    model = get_model()
+    texts = [""] * len(audios)
+    batch = []
+    for i, audio in enumerate(audios):
+        audio = _as_whisper_input(audio, sample_rate)
+        if len(audio) == 0:
+            continue
+        if len(audio) > MAX_BATCH_SECONDS * SAMPLE_RATE:
+            texts[i] = " ".join(stream_segments(audio))
+        else:
+            batch.append((i, audio))
+    if not batch:
+        return texts
+
+    features = np.stack([pad_or_trim(model.feature_extractor(audio)) for _, audio in batch])
+    encoded = model.model.encode(get_ctranslate2_storage(features))
+    tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe",
+                          language=WHISPER_LANGUAGE if model.model.is_multilingual else None)
+    prompt = tokenizer.sot_sequence + [tokenizer.no_timestamps]
+    results = model.model.generate(
+        encoded,
+        [prompt] * len(batch),
+        beam_size=1,
+        max_length=model.max_length,
+        return_no_speech_prob=True,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+    )
+    for (i, _), result in zip(batch, results):
+        if result.no_speech_prob < NO_SPEECH_THRESHOLD:
+            texts[i] = tokenizer.decode(result.sequences_ids[0]).strip()
+    return texts
@@ -26,6 +26,8 @@ export default function MockCoach() {
     "Medium",
   );
   const [extractedResume, setExtractedResume] = useState("");
+  // Server-side coach session: the backend keeps the resume and history
+  const [coachSessionId, setCoachSessionId] = useState("");
 
   // --- INTERVIEW STATE ---
   const [messages, setMessages] = useState<Message[]>([]);
@@ -215,6 +217,7 @@ export default function MockCoach() {
 
       setMessages([{ role: "assistant", content: data.message }]);
       setExtractedResume(data.extracted_resume);
+      setCoachSessionId(data.session_id || "");
       setCurrentQuestionCount(1);
       setStep("interview");
       setIsSessionActive(true);
@@ -246,19 +249,24 @@ export default function MockCoach() {
 
     try {
       if (currentQuestionCount >= targetQuestions) {
-        await generateFinalScore(newHistory);
+        await generateFinalScore(newHistory, finalInputToSend);
       } else {
         const res = await fetch(`${BACKEND_URL}/coach/reply`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({
-            history: newHistory,
-            job_description: jobDescription,
-            difficulty: difficulty,
-            user_answer: input,
-            resume_text: extractedResume,
-          }),
+          body: JSON.stringify(
+            coachSessionId
+              ? { session_id: coachSessionId, user_answer: finalInputToSend }
+              : {
+                  history: newHistory,
+                  job_description: jobDescription,
+                  difficulty: difficulty,
+                  user_answer: input,
+                  resume_text: extractedResume,
+                },
+          ),
         });
+        if (!res.ok) throw new Error(`Coach reply failed: ${res.status}`);
         const data = await res.json();
         setMessages((prev) => [
           ...prev,
@@ -273,20 +281,28 @@ export default function MockCoach() {
     }
   };
 
-  const generateFinalScore = async (finalHistory: Message[]) => {
+  const generateFinalScore = async (
+    finalHistory: Message[],
+    finalAnswer: string,
+  ) => {
     setIsSessionActive(false);
     try {
       const res = await fetch(`${BACKEND_URL}/coach/end`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          history: finalHistory,
-          resume_text: extractedResume,
-          job_description: jobDescription,
-          user_answer: "",
-          difficulty: difficulty,
-        }),
+        body: JSON.stringify(
+          coachSessionId
+            ? { session_id: coachSessionId, user_answer: finalAnswer }
+            : {
+                history: finalHistory,
+                resume_text: extractedResume,
+                job_description: jobDescription,
+                user_answer: "",
+                difficulty: difficulty,
+              },
+        ),
       });
+      if (!res.ok) throw new Error(`Coach end failed: ${res.status}`);
       const data = await res.json();
       setScorecard(data.message);
       setStep("score");